@@ -1,6 +1,26 @@
-import random
+import argparse
+import csv
+import io
+import json
+import math
+import sys
+import time
 from collections import defaultdict
 
+import numpy as np
+
+from cover_stats import cover_time_statistics
+from exact_solver import cover_time_moments, last_position_distribution
+from graph_walk import batch_last_vertex_counts, walk_graph
+from parallel_runner import ENGINES, parallel_last_position_counts
+from progress import console_reporter, throttled
+from sequential_mc import run_until_precision
+from variance_reduction import ESTIMATORS, variance_reduced_last_position
+from walk_kernel import walk_arc, walk_events, iter_walk
+
+# Walks run between progress reports in the one-walk-at-a-time loop
+PROGRESS_CHUNK = 1000
+
 class LadybugClockWalk:
     """
     Simulates a ladybug walking randomly on a clock face (positions 1-12).
@@ -8,96 +28,197 @@ class LadybugClockWalk:
     We track which number is the last to be visited (colored).
     """
     
-    def __init__(self, num_positions=12, start_position=12):
+    def __init__(self, num_positions=12, start_position=12, graph=None, clockwise_prob=0.5):
         """
         Initialize the simulation.
         
         Args:
             num_positions: Number of positions on the clock (12)
             start_position: Starting position (12 for clock)
+            graph: Optional graph_walk.Graph to walk on instead of the clock
+                (num_positions then comes from the graph)
+            clockwise_prob: Probability of moving clockwise on each step (clock only)
         """
+        if graph is not None:
+            num_positions = graph.num_vertices
+        self.graph = graph
         self.num_positions = num_positions
         self.start_position = start_position
+        self.clockwise_prob = clockwise_prob
         self.positions = list(range(1, num_positions + 1))
         
-    def run_single_simulation(self, verbose=False):
+    def run_single_simulation(self, verbose=False, engine="step"):
         """
         Run one complete simulation until all positions are visited.
         
         Args:
             verbose: If True, print detailed output for each step
+            engine: "step" walks one step at a time, "event" jumps straight
+                from one newly colored position to the next (no verbose output)
             
         Returns:
             The last position to be visited
         """
-        current_pos = self.start_position
-        visited = {current_pos}
-        step = 0
-        
-        if verbose:
-            print(f"\n{'='*60}")
-            print(f"SIMULATION START")
-            print(f"{'='*60}")
-            print(f"Step {step}: Starting at position {current_pos}")
-            print(f"Visited so far: {sorted(visited)}")
-        
-        # Continue until all 12 positions are visited
-        while len(visited) < self.num_positions:
-            # Choose random direction: -1 (counterclockwise) or +1 (clockwise)
-            direction = random.choice([-1, 1])
-            
-            # Move to neighboring position (wrapping around)
-            current_pos = ((current_pos - 1 + direction) % self.num_positions) + 1
-            
-            step += 1
-            is_new = current_pos not in visited
-            
-            if is_new:
-                visited.add(current_pos)
-                
+        if self.graph is not None:
+            result = walk_graph(self.graph, self.start_position)
             if verbose:
-                direction_name = "clockwise" if direction == 1 else "counterclockwise"
-                status = "🔴 NEW!" if is_new else "(already visited)"
-                print(f"Step {step}: Moved {direction_name} to position {current_pos:2d} {status}")
-                if is_new:
-                    print(f"          Visited: {sorted(visited)} ({len(visited)}/12)")
+                print(f"Walk on a {self.num_positions}-vertex graph: last vertex colored "
+                      f"{result['last_position']} after {result['steps']} steps")
+            return result['last_position']
         
-        last_visited = current_pos
+        if engine == "event":
+            return walk_events(self.num_positions, self.start_position,
+                               self.clockwise_prob)['last_position']
         
         if verbose:
+            last_step = self._print_walk(iter_walk(self.num_positions, self.start_position,
+                                                   self.clockwise_prob))
+            last_visited = last_step.position
             print(f"\n{'='*60}")
             print(f"SIMULATION COMPLETE!")
             print(f"Last position to be colored: {last_visited}")
-            print(f"All positions visited in {step} steps")
+            print(f"All positions visited in {last_step.step} steps")
             print(f"{'='*60}\n")
+            return last_visited
+        
+        return walk_arc(self.num_positions, self.start_position, self.clockwise_prob)['last_position']
+    
+    def _print_walk(self, steps):
+        """
+        Print every step of a streamed walk as it arrives.
+        
+        Args:
+            steps: Iterable of WalkStep events (see walk_kernel.iter_walk)
+            
+        Returns:
+            The final WalkStep
+        """
+        print(f"\n{'='*60}")
+        print(f"SIMULATION START")
+        print(f"{'='*60}")
         
-        return last_visited
+        visited = []
+        event = None
+        for event in steps:
+            if event.is_new:
+                visited.append(event.position)
+            if event.step == 0:
+                print(f"Step 0: Starting at position {event.position}")
+                print(f"Visited so far: {visited}")
+                continue
+            
+            direction_name = "clockwise" if event.direction == 1 else "counterclockwise"
+            status = "🔴 NEW!" if event.is_new else "(already visited)"
+            print(f"Step {event.step}: Moved {direction_name} to position {event.position:2d} {status}")
+            if event.is_new:
+                print(f"          Visited: {sorted(visited)} ({event.covered_count}/{self.num_positions})")
+        return event
     
-    def run_multiple_simulations(self, num_runs=10000, verbose_first_n=0):
+    def run_multiple_simulations(self, num_runs=10000, verbose_first_n=0, engine="step",
+                                 workers=None, seed=None, estimator=None, remaining=None,
+                                 progress=None):
         """
         Run multiple simulations and collect statistics.
         
         Args:
             num_runs: Number of simulations to run
             verbose_first_n: Print detailed output for first n simulations
+            engine: "step" or "event" (see run_single_simulation); with
+                workers set, "batch" (vectorized NumPy) is also available
+            workers: If set, run across this many processes, each on its own
+                random stream spawned from seed (engine and workers are clock
+                only; a graph raises ValueError if either is set)
+            seed: Master seed for the parallel mode (reproducible for a
+                given seed and worker count)
+            estimator: "antithetic" or "conditional" to estimate the
+                probabilities with a variance-reduced estimator instead of
+                counting (see variance_reduction; clock only)
+            remaining: For "conditional", positions left uncolored when the
+                exact answer takes over (None for variance_reduction's default)
+            progress: Callback(runs_done, num_runs), called between chunks of
+                runs at most progress.DEFAULT_MAX_RATE times a second (None
+                prints "Completed ..." lines)
             
         Returns:
-            Dictionary with statistics
+            Dictionary with statistics (with an estimator, the dictionary
+            from variance_reduction.variance_reduced_last_position)
         """
         last_position_counts = defaultdict(int)
+        progress = throttled(console_reporter() if progress is None else progress)
         
         print(f"\n{'='*70}")
         print(f"RUNNING {num_runs:,} SIMULATIONS")
         print(f"{'='*70}\n")
         
-        for run_num in range(num_runs):
-            is_verbose = (run_num < verbose_first_n)
-            last_pos = self.run_single_simulation(verbose=is_verbose)
-            last_position_counts[last_pos] += 1
+        if estimator is not None:
+            if self.graph is not None:
+                raise ValueError("Variance-reduced estimators are only available on the clock")
+            result = variance_reduced_last_position(
+                self.num_positions, self.start_position, self.clockwise_prob, num_runs,
+                estimator=estimator, remaining=remaining, rng=seed, progress=progress
+            )
+            print(f"Estimator: {estimator}")
+            print(f"Effective sample size: {result['ess']:,.0f} "
+                  f"({result['overall_gain']:.2f}x the {result['runs']:,} walks run)")
+            if result['overall_gain'] < 1:
+                print("Warning: this estimator is noisier than plain counting here")
+            
+            print(f"\n{'='*70}")
+            print(f"FINAL RESULTS")
+            print(f"{'='*70}\n")
+            
+            return result
+        
+        if self.graph is not None:
+            # Graph walks run as one batch in this process
+            if workers is not None or engine != "step":
+                raise ValueError("The engine and workers options are only available on the clock")
+            for _ in range(min(verbose_first_n, num_runs)):
+                last_position_counts[self.run_single_simulation(verbose=True)] += 1
+            counts = batch_last_vertex_counts(self.graph, self.start_position,
+                                              num_runs - min(verbose_first_n, num_runs), rng=seed,
+                                              progress=progress)
+            for pos in np.flatnonzero(counts):
+                last_position_counts[int(pos)] += int(counts[pos])
+            
+            print(f"\n{'='*70}")
+            print(f"FINAL RESULTS")
+            print(f"{'='*70}\n")
             
-            # Print progress
-            if (run_num + 1) % 1000 == 0:
-                print(f"Completed {run_num + 1:,} / {num_runs:,} simulations...")
+            return last_position_counts
+        
+        if workers is not None:
+            # Verbose example runs stay in this process, the rest go to the pool
+            for _ in range(min(verbose_first_n, num_runs)):
+                last_position_counts[self.run_single_simulation(verbose=True)] += 1
+            
+            counts = parallel_last_position_counts(
+                self.num_positions, self.start_position, self.clockwise_prob,
+                num_runs - min(verbose_first_n, num_runs),
+                seed=seed, workers=workers, engine=engine, on_chunk=progress
+            )
+            for pos in range(1, self.num_positions + 1):
+                if counts[pos]:
+                    last_position_counts[pos] += int(counts[pos])
+            
+            print(f"\n{'='*70}")
+            print(f"FINAL RESULTS")
+            print(f"{'='*70}\n")
+            
+            return last_position_counts
+        
+        n_verbose = min(verbose_first_n, num_runs)
+        for _ in range(n_verbose):
+            last_position_counts[self.run_single_simulation(verbose=True)] += 1
+        
+        # Plain runs go in chunks, with progress reported only between chunks
+        runs_done = n_verbose
+        while runs_done < num_runs:
+            chunk = min(PROGRESS_CHUNK, num_runs - runs_done)
+            for _ in range(chunk):
+                last_position_counts[self.run_single_simulation(engine=engine)] += 1
+            runs_done += chunk
+            progress(runs_done, num_runs)
         
         print(f"\n{'='*70}")
         print(f"FINAL RESULTS")
@@ -105,6 +226,82 @@ class LadybugClockWalk:
         
         return last_position_counts
     
+    def run_until_precision(self, tolerance=0.005, confidence=0.95, method="wilson", seed=None):
+        """
+        Run simulations in chunks until every P(last = k) is known to within tolerance.
+        
+        Args:
+            tolerance: Stop once the widest confidence interval is narrower than this
+            confidence: Two-sided confidence level of the intervals
+            method: "wilson" or "clopper-pearson"
+            seed: Seed for the random stream (optional)
+            
+        Returns:
+            Tuple of (dictionary of counts, runs used, result from
+            sequential_mc.run_until_precision with the intervals)
+        """
+        print(f"\n{'='*70}")
+        print(f"RUNNING SIMULATIONS UNTIL EVERY INTERVAL IS < {tolerance}")
+        print(f"{'='*70}\n")
+        
+        result = run_until_precision(
+            self.num_positions, self.start_position, self.clockwise_prob,
+            tolerance=tolerance, confidence=confidence, method=method, seed=seed
+        )
+        
+        last_position_counts = defaultdict(int)
+        for pos in range(1, self.num_positions + 1):
+            if result['counts'][pos]:
+                last_position_counts[pos] = int(result['counts'][pos])
+        
+        status = "reached" if result['converged'] else "NOT reached"
+        print(f"Tolerance {status} after {result['runs']:,} simulations "
+              f"(widest {confidence:.0%} interval: {result['max_width']:.6f})")
+        
+        return last_position_counts, result['runs'], result
+    
+    def run_cover_time_statistics(self, num_runs=100000, seed=None):
+        """
+        Run simulations that keep each walk's cover time and first-visit times.
+        
+        Args:
+            num_runs: Number of simulations to run
+            seed: Seed for the random stream (optional)
+            
+        Returns:
+            Dictionary from cover_stats.cover_time_statistics
+        """
+        stats = cover_time_statistics(self.num_positions, self.start_position, self.clockwise_prob,
+                                      num_runs, rng=seed)
+        exact = cover_time_moments(self.num_positions, self.clockwise_prob)
+        
+        print(f"Steps to color every position ({stats['runs']:,} runs):")
+        print(f"  Simulated mean: {stats['mean_steps']:.3f}  (std {stats['std_steps']:.3f})")
+        print(f"  Exact mean:     {exact['mean']:.3f}  (std {exact['std']:.3f})\n")
+        print(f"{'Position':<12} {'Mean steps if last':<22} {'Mean first visit':<18}")
+        print(f"{'-'*52}")
+        for pos in range(1, self.num_positions + 1):
+            mean_if_last = stats['mean_steps_by_last'][pos]
+            # The start position is never the last one colored
+            mean_if_last = "-" if math.isnan(mean_if_last) else f"{mean_if_last:.2f}"
+            print(f"{pos:<12} {mean_if_last:<22} {stats['first_visit_mean'][pos]:<18.2f}")
+        print()
+        
+        return stats
+    
+    def print_intervals(self, result):
+        """
+        Print the confidence interval for each position.
+        
+        Args:
+            result: Dictionary returned by sequential_mc.run_until_precision
+        """
+        print(f"{'Position':<12} {'Lower':<15} {'Upper':<15}")
+        print(f"{'-'*42}")
+        for pos in range(1, self.num_positions + 1):
+            print(f"{pos:<12} {result['lower'][pos]:<15.6f} {result['upper'][pos]:<15.6f}")
+        print()
+    
     def print_statistics(self, last_position_counts, num_runs):
         """
         Print formatted statistics from the simulation runs.
@@ -135,8 +332,188 @@ class LadybugClockWalk:
         return last_position_counts[6] / num_runs if 6 in last_position_counts else 0
 
 
-def main():
-    """Main execution function."""
+OUTPUT_FORMATS = ("json", "csv", "npz")
+
+
+def run_batch(num_positions=12, start_position=12, clockwise_prob=0.5, num_runs=50000,
+              seed=None, workers=1, engine="batch", estimator=None, remaining=None,
+              progress=None):
+    """
+    Run walks without printing anything and collect machine-readable results.
+    
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        num_runs: Number of walks to run
+        seed: Master seed (reproducible for a given seed and worker count)
+        workers: Number of processes (1 runs in this process)
+        engine: "batch", "step" or "event" (see parallel_runner)
+        estimator: "antithetic" or "conditional" for a variance-reduced
+            estimate (in-process; see variance_reduction)
+        remaining: For "conditional", positions left uncolored when the exact
+            answer takes over (None for the default)
+        progress: Optional callback(runs_done, num_runs), throttled as chunks finish
+        
+    Returns:
+        Dictionary with the parameters, 'counts', 'probabilities' and 'exact'
+        (length N + 1 arrays, entry 0 unused), 'elapsed_seconds' and
+        'runs_per_second'. With an estimator 'engine' is replaced by
+        'estimator' and 'remaining', 'counts' are fractional
+        (probabilities x runs) and 'std_error', 'ess_gain' and
+        'overall_gain' are added.
+    """
+    started = time.perf_counter()
+    # What produced the counts: the simulation engine or the estimator
+    method = {'engine': engine}
+    extra = {}
+    if estimator is not None:
+        if workers != 1:
+            raise ValueError("Variance-reduced estimators run in-process (workers=1)")
+        estimate = variance_reduced_last_position(num_positions, start_position, clockwise_prob,
+                                                  num_runs, estimator=estimator,
+                                                  remaining=remaining, rng=seed, progress=progress)
+        counts = estimate['counts']
+        num_runs = estimate['runs']
+        method = {key: estimate[key] for key in ('estimator', 'remaining')}
+        extra = {key: estimate[key] for key in ('std_error', 'ess_gain', 'overall_gain')}
+    else:
+        counts = parallel_last_position_counts(num_positions, start_position, clockwise_prob,
+                                               num_runs, seed=seed, workers=workers, engine=engine,
+                                               on_chunk=progress)
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'num_positions': num_positions,
+        'start_position': start_position,
+        'clockwise_prob': clockwise_prob,
+        'runs': num_runs,
+        'seed': seed,
+        'workers': workers,
+        **method,
+        'counts': counts,
+        'probabilities': counts / num_runs if num_runs else np.zeros(num_positions + 1),
+        'exact': last_position_distribution(num_positions, start_position, clockwise_prob),
+        'elapsed_seconds': elapsed,
+        'runs_per_second': num_runs / elapsed if elapsed > 0 else float('inf'),
+        **extra
+    }
+
+
+def format_results(result, fmt="json"):
+    """
+    Serialize a run_batch result.
+    
+    Args:
+        result: Dictionary returned by run_batch
+        fmt: "json" (everything), "csv" (one row per position) or "npz"
+        
+    Returns:
+        The file contents as bytes
+    """
+    if fmt == "json":
+        document = {key: value.tolist() if isinstance(value, np.ndarray) else value
+                    for key, value in result.items()}
+        return (json.dumps(document, indent=2) + "\n").encode()
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        estimated = 'std_error' in result
+        writer.writerow(["position", "count", "probability", "exact"]
+                        + (["std_error"] if estimated else []))
+        for pos in range(1, result['num_positions'] + 1):
+            count = result['counts'][pos]
+            writer.writerow([pos, repr(float(count)) if estimated else int(count),
+                             repr(float(result['probabilities'][pos])),
+                             repr(float(result['exact'][pos]))]
+                            + ([repr(float(result['std_error'][pos]))] if estimated else []))
+        return buffer.getvalue().encode()
+    if fmt == "npz":
+        buffer = io.BytesIO()
+        # None (no seed) has no array form, so it is left out
+        np.savez(buffer, **{key: value for key, value in result.items() if value is not None})
+        return buffer.getvalue()
+    raise ValueError(f"Unknown output format {fmt!r}, expected one of {OUTPUT_FORMATS}")
+
+
+def parse_args(argv):
+    """Parse the headless command line (see main)"""
+    parser = argparse.ArgumentParser(
+        description="Run Ladybug Clock walks headless and write machine-readable results. "
+                    "Run without arguments for the narrated demo."
+    )
+    parser.add_argument("--positions", "-n", type=int, default=12, help="Number of positions on the clock")
+    parser.add_argument("--start", type=int, default=None, help="Starting position (default: the last one)")
+    parser.add_argument("--clockwise-prob", "-p", type=float, default=0.5,
+                        help="Probability of moving clockwise on each step")
+    parser.add_argument("--runs", type=int, default=50000, help="Number of walks")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (1 runs in-process)")
+    parser.add_argument("--engine", choices=ENGINES, default=None,
+                        help="Simulation engine (default: batch)")
+    parser.add_argument("--estimator", choices=ESTIMATORS, default=None,
+                        help="Variance-reduced estimate instead of plain counts")
+    parser.add_argument("--remaining", type=int, default=None,
+                        help="For --estimator conditional: positions left uncolored when the "
+                             "exact answer takes over (default: three quarters of the clock)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="Output format")
+    parser.add_argument("--output", "-o", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--progress", action="store_true",
+                        help="Report progress on stderr (at most 10 lines a second)")
+    args = parser.parse_args(argv)
+    
+    if args.positions < 1:
+        parser.error("--positions must be at least 1")
+    if args.start is None:
+        args.start = args.positions
+    if not 1 <= args.start <= args.positions:
+        parser.error("--start must be between 1 and --positions")
+    if not 0.0 <= args.clockwise_prob <= 1.0:
+        parser.error("--clockwise-prob must be between 0 and 1")
+    if args.runs < 0 or args.workers < 1:
+        parser.error("--runs must be non-negative and --workers at least 1")
+    if args.estimator is not None and args.workers != 1:
+        parser.error("--estimator runs in-process (--workers 1)")
+    if args.estimator is not None and args.engine is not None:
+        parser.error("--engine and --estimator can't be combined")
+    if args.engine is None:
+        args.engine = "batch"
+    if args.remaining is not None:
+        if args.estimator != "conditional":
+            parser.error("--remaining needs --estimator conditional")
+        if not 1 <= args.remaining <= max(args.positions - 1, 1):
+            parser.error("--remaining must be between 1 and --positions - 1")
+    return args
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+    
+    With no arguments the narrated demo runs. With any argument the walks run
+    headless (nothing printed while they run) and only the results are written.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        demo()
+        return
+    
+    args = parse_args(argv)
+    result = run_batch(args.positions, args.start, args.clockwise_prob, args.runs,
+                       seed=args.seed, workers=args.workers, engine=args.engine,
+                       estimator=args.estimator, remaining=args.remaining,
+                       progress=console_reporter(sys.stderr) if args.progress else None)
+    data = format_results(result, args.format)
+    if args.output == "-":
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as f:
+            f.write(data)
+
+
+def demo():
+    """Narrated demo: example walks, a precision run and the cover time."""
     
     # Set random seed for reproducibility (optional)
     # random.seed(42)
@@ -153,15 +530,12 @@ def main():
         print(f"\n--- EXAMPLE RUN {i+1} ---")
         sim.run_single_simulation(verbose=True)
     
-    # Run many simulations to estimate the probability
-    num_simulations = 50000
-    last_position_counts = sim.run_multiple_simulations(
-        num_runs=num_simulations,
-        verbose_first_n=0  # Set to 0 to skip verbose output for main run
-    )
+    # Run simulations until every probability is pinned down to +/- 0.25%
+    last_position_counts, num_simulations, precision = sim.run_until_precision(tolerance=0.005)
     
     # Print statistics
     prob_6 = sim.print_statistics(last_position_counts, num_simulations)
+    sim.print_intervals(precision)
     
     # Additional analysis
     print("="*70)
@@ -179,6 +553,12 @@ def main():
     print("Note: Due to symmetry of random walk on a cycle,")
     print("positions directly opposite to start (12) tend to be last more often.")
     print(f"Position 6 is exactly opposite to start position 12.\n")
+    
+    # How long it takes to color the whole clock
+    print("="*70)
+    print("COVER TIME")
+    print("="*70 + "\n")
+    sim.run_cover_time_statistics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental accumulation of simulation runs.
+
+A RunAccumulator remembers the last position of every walk run so far for
+one parameter set. Asking for more runs only simulates the shortfall, and
+asking for fewer reads the counts of the first n runs without simulating
+anything. Accumulators for the same parameters can be merged.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from batch_engine import batch_last_positions, counts_to_dict
+
+# Runs per stored block; each block also keeps its cumulative counts
+BLOCK_SIZE = 1000
+
+
+class RunAccumulator:
+    """Growing record of last positions for one (N, start, clockwise_prob) parameter set"""
+
+    def __init__(self, num_positions=12, start_position=12, clockwise_prob=0.5, seed=None):
+        """
+        Args:
+            num_positions: Number of positions on the clock
+            start_position: Starting position (1..num_positions)
+            clockwise_prob: Probability of moving clockwise on each step
+            seed: Seed for this accumulator's random stream
+        """
+        self.num_positions = num_positions
+        self.start_position = start_position
+        self.clockwise_prob = clockwise_prob
+        self._rng = np.random.default_rng(seed)
+        self._positions = np.zeros(0, dtype=np.uint16 if num_positions < 1 << 16 else np.uint32)
+        # _prefix[b] = counts of the first b * BLOCK_SIZE runs
+        self._prefix = np.zeros((1, num_positions + 1), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @property
+    def runs(self):
+        """Number of runs accumulated so far"""
+        return len(self._positions)
+
+    def _append(self, positions):
+        old_runs = self.runs
+        self._positions = np.concatenate([self._positions, positions])
+        first_block = old_runs // BLOCK_SIZE
+        last_block = self.runs // BLOCK_SIZE
+        if last_block == first_block:
+            return
+        # Count every newly completed block in one bincount, then extend the prefix sums
+        width = self.num_positions + 1
+        blocks = self._positions[first_block * BLOCK_SIZE:last_block * BLOCK_SIZE]
+        block_index = np.arange(len(blocks)) // BLOCK_SIZE
+        per_block = np.bincount(block_index * width + blocks,
+                                minlength=(last_block - first_block) * width)
+        per_block = per_block.reshape(-1, width)
+        self._prefix = np.vstack([self._prefix, self._prefix[-1] + np.cumsum(per_block, axis=0)])
+
+    def extend_to(self, n_runs, progress=None):
+        """
+        Make sure at least n_runs runs are accumulated, simulating only the shortfall.
+
+        Args:
+            n_runs: Number of runs wanted
+            progress: Optional callback(new_runs_done, shortfall) for the simulation
+
+        Returns:
+            Number of new runs simulated
+        """
+        with self._lock:
+            shortfall = n_runs - self.runs
+            if shortfall <= 0:
+                return 0
+            self._append(batch_last_positions(self.num_positions, self.start_position,
+                                              self.clockwise_prob, shortfall, rng=self._rng,
+                                              progress=progress))
+            return shortfall
+
+    def counts(self, n_runs=None, progress=None):
+        """
+        Counts of the last position over the first n_runs runs.
+
+        Args:
+            n_runs: Number of runs to count (all accumulated runs if None);
+                runs that are missing are simulated first
+            progress: Optional progress callback for the missing runs
+
+        Returns:
+            numpy array of length num_positions + 1
+        """
+        if n_runs is None:
+            n_runs = self.runs
+        self.extend_to(n_runs, progress)
+        with self._lock:
+            full_blocks = n_runs // BLOCK_SIZE
+            tail = self._positions[full_blocks * BLOCK_SIZE:n_runs]
+            return self._prefix[full_blocks] + np.bincount(tail, minlength=self.num_positions + 1)
+
+    def counts_dict(self, n_runs=None, progress=None):
+        """Same as counts() but as a defaultdict(int) histogram"""
+        return counts_to_dict(self.counts(n_runs, progress))
+
+    def merge(self, other):
+        """
+        Append the runs of another accumulator with the same parameters.
+
+        Both accumulators must use independent random streams (different seeds).
+        """
+        if (other.num_positions, other.start_position, other.clockwise_prob) != \
+                (self.num_positions, self.start_position, self.clockwise_prob):
+            raise ValueError("Can only merge accumulators with the same parameters")
+        with other._lock:
+            positions = other._positions.copy()
+        with self._lock:
+            self._append(positions.astype(self._positions.dtype))
+        return self
+
+
+class AccumulatorStore:
+    """Small LRU of accumulators, one per parameter set"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._accumulators = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, num_positions=12, start_position=12, clockwise_prob=0.5):
+        """Return the accumulator for these parameters, creating it if needed"""
+        key = (num_positions, start_position, round(float(clockwise_prob), 12))
+        with self._lock:
+            if key not in self._accumulators:
+                self._accumulators[key] = RunAccumulator(num_positions, start_position,
+                                                         clockwise_prob)
+            self._accumulators.move_to_end(key)
+            while len(self._accumulators) > self.max_entries:
+                self._accumulators.popitem(last=False)
+            return self._accumulators[key]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized batch engine for the Ladybug Clock Problem.
+
+Instead of running one pure-Python walk after another, this engine advances
+a whole block of walks together as NumPy arrays, one step at a time, and drops
+each walk from the block as soon as it has colored every position.
+
+A walk on a cycle always covers one contiguous arc around its start, so each
+walk only needs three small integers: its current offset from the start and
+the furthest offsets it has reached clockwise and counterclockwise.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from progress import throttled
+
+# Walks advanced together per block (keeps the working arrays in cache)
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+
+def step_directions(rng, n, clockwise_prob):
+    """Draw n steps: +1 (clockwise) with probability clockwise_prob, else -1"""
+    if clockwise_prob == 0.5:
+        # Fair coin: unpack random bytes into bits, 8 steps per byte drawn. Exact,
+        # and about 4x faster than either rng.random or rng.integers(0, 2) per step
+        # (0.033 s against 0.15 s for 200 draws of 2^18 steps; whole walks gain only
+        # a few percent, since the reach updates dominate)
+        bits = np.unpackbits(np.frombuffer(rng.bytes((n + 7) // 8), dtype=np.uint8), count=n)
+        return (bits.view(np.int8) << 1) - 1
+    clockwise = rng.random(n) < clockwise_prob
+    return clockwise.view(np.int8) * 2 - 1
+
+
+def _last_offsets_for_chunk(num_positions, clockwise_prob, n_walks, rng):
+    """
+    Run n_walks walks to full coverage and return the offset (from the start)
+    at which each walk colored its final position.
+    """
+    span = num_positions - 1
+    dtype = np.int16 if num_positions < 1 << 14 else np.int32
+
+    offset = np.zeros(n_walks, dtype=dtype)
+    reach_cw = np.zeros(n_walks, dtype=dtype)
+    reach_ccw = np.zeros(n_walks, dtype=dtype)  # stored as a non-positive offset
+
+    finished = []
+    while offset.size:
+        offset += step_directions(rng, offset.size, clockwise_prob)
+        np.maximum(reach_cw, offset, out=reach_cw)
+        np.minimum(reach_ccw, offset, out=reach_ccw)
+
+        done = (reach_cw - reach_ccw) == span
+        if done.any():
+            finished.append(offset[done])
+            keep = ~done
+            offset = offset[keep]
+            reach_cw = reach_cw[keep]
+            reach_ccw = reach_ccw[keep]
+
+    if not finished:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(finished).astype(np.int64)
+
+
+def _iter_last_position_chunks(num_positions, start_position, clockwise_prob,
+                               n_simulations, rng, chunk_size, progress=None):
+    """Yield arrays of last positions, one block of walks at a time, reporting each to progress"""
+    progress = throttled(progress)
+    if num_positions == 1:
+        # The start is the only position, so it is trivially the last one
+        last = start_position
+    elif clockwise_prob in (0.0, 1.0):
+        # Deterministic walk: it just goes round until the far end is colored
+        step = 1 if clockwise_prob == 1.0 else -1
+        last = ((start_position - 1 + step * (num_positions - 1)) % num_positions) + 1
+    else:
+        last = None
+
+    remaining = n_simulations
+    while remaining > 0:
+        n_chunk = min(chunk_size, remaining)
+        if last is not None:
+            yield np.full(n_chunk, last, dtype=np.int64)
+        else:
+            offsets = _last_offsets_for_chunk(num_positions, clockwise_prob, n_chunk, rng)
+            yield (start_position - 1 + offsets) % num_positions + 1
+        remaining -= n_chunk
+        if progress is not None:
+            progress(n_simulations - remaining, n_simulations)
+
+
+def batch_last_position_counts(num_positions=12, start_position=12, clockwise_prob=0.5,
+                               n_simulations=10000, rng=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                               progress=None):
+    """
+    Run many complete walks at once and count the last position colored.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        n_simulations: Number of walks to run
+        rng: numpy Generator, seed, or None for a fresh unseeded generator
+        chunk_size: Number of walks advanced together in one block
+        progress: Optional callback(walks_done, n_simulations), called between
+            blocks at most progress.DEFAULT_MAX_RATE times a second
+
+    Returns:
+        numpy array of length num_positions + 1 where entry k is the number
+        of walks whose last colored position was k (entry 0 is unused)
+    """
+    rng = np.random.default_rng(rng)
+    counts = np.zeros(num_positions + 1, dtype=np.int64)
+    for positions in _iter_last_position_chunks(num_positions, start_position, clockwise_prob,
+                                                n_simulations, rng, chunk_size, progress):
+        counts += np.bincount(positions, minlength=num_positions + 1)
+    return counts
+
+
+def batch_last_positions(num_positions=12, start_position=12, clockwise_prob=0.5,
+                         n_simulations=10000, rng=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                         progress=None):
+    """
+    Run many complete walks at once and return every walk's last position.
+
+    Same arguments as batch_last_position_counts (progress included).
+
+    Returns:
+        numpy uint16/uint32 array with one last position per walk
+    """
+    rng = np.random.default_rng(rng)
+    dtype = np.uint16 if num_positions < 1 << 16 else np.uint32
+    chunks = [positions.astype(dtype) for positions in
+              _iter_last_position_chunks(num_positions, start_position, clockwise_prob,
+                                         n_simulations, rng, chunk_size, progress)]
+    if not chunks:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(chunks)
+
+
+def counts_to_dict(counts):
+    """Convert a bincount array into the defaultdict(int) histogram used elsewhere"""
+    results = defaultdict(int)
+    for pos in np.flatnonzero(counts):
+        results[int(pos)] = int(counts[pos])
+    return results
+
+
+def counts_from_dict(results, num_positions=12):
+    """Convert a defaultdict(int) histogram back into a bincount array"""
+    counts = np.zeros(num_positions + 1, dtype=np.int64)
+    for pos, count in results.items():
+        counts[pos] = count
+    return counts
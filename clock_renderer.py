@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Fast clock rendering for animations.
+
+ClockAnimator draws the clock face, labels and legend once, keeps a copy of
+that background, and for every frame only updates and redraws the moving
+parts (marker colors, the "L" ladybug marker, the arrow, the direction label
+and the title) on top of it - the usual matplotlib blitting technique, done on
+an Agg canvas so it works without a GUI. Frames come back as RGBA arrays that
+can be handed straight to st.image.
+
+The figure is a plain matplotlib Figure (not created through pyplot), so it
+is never registered globally and is freed with the animator.
+
+CachedClockRenderer adds a state-keyed LRU cache of PNG-encoded frames on
+top, so a clock state that has been drawn once (in a replay, or by another
+user) is never drawn again.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+from matplotlib.patches import Circle, Patch
+
+
+def position_xy(position, num_positions):
+    """Unit-circle coordinates of a clock position (12 o'clock at the top)"""
+    angle = np.pi/2 - position * 2 * np.pi / num_positions
+    return np.cos(angle), np.sin(angle)
+
+
+class ClockAnimator:
+    """Renders successive clock frames by reusing one figure and its artists"""
+
+    def __init__(self, num_positions=12, start_position=12, figsize=(10, 10), dpi=100):
+        """
+        Args:
+            num_positions: Number of positions on the clock
+            start_position: Starting position (drawn in blue)
+            figsize: Figure size in inches
+            dpi: Resolution of the rendered frames
+        """
+        self.num_positions = num_positions
+        self.start_position = start_position
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot(1, 1, 1)
+        self.fig.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=0.92)
+        self.ax = ax
+
+        # Static parts: circle, number labels, legend
+        ax.add_patch(Circle((0, 0), 1, fill=False, edgecolor='black', linewidth=2))
+        xs, ys = zip(*(position_xy(i, num_positions) for i in range(1, num_positions + 1)))
+        self._xs = np.array(xs)
+        self._ys = np.array(ys)
+        for i in range(1, num_positions + 1):
+            ax.text(self._xs[i - 1] * 1.2, self._ys[i - 1] * 1.2, str(i), fontsize=14,
+                    ha='center', va='center', fontweight='bold')
+
+        legend_elements = [
+            Patch(facecolor='blue', edgecolor='black', label=f'Start ({start_position})'),
+            Patch(facecolor='green', edgecolor='black', label='Visited'),
+            Patch(facecolor='lightgray', edgecolor='black', label='Not Visited'),
+            Patch(facecolor='red', edgecolor='black', label='Last Position')
+        ]
+        ax.legend(handles=legend_elements, loc='upper left', fontsize=10)
+        ax.set_xlim(-1.5, 1.5)
+        ax.set_ylim(-1.5, 1.5)
+        ax.set_aspect('equal')
+        ax.axis('off')
+
+        # Moving parts, drawn on top of the cached background every frame
+        self.markers = ax.scatter(self._xs, self._ys, s=100, c='lightgray', zorder=5, alpha=0.7,
+                                  edgecolors='black', linewidth=2, animated=True)
+        self.arrow = ax.arrow(0, 0, 0, 0, head_width=0.1, head_length=0.08, fc='orange',
+                              ec='orange', linewidth=2.5, zorder=8, alpha=0.8, animated=True)
+        self.direction_text = ax.text(0, 0, '', fontsize=11, ha='center',
+                                      bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7),
+                                      fontweight='bold', zorder=9, animated=True)
+        self.ladybug = ax.text(0, 0, 'L', fontsize=40, ha='center', va='center', zorder=10,
+                               color='red', fontweight='bold', animated=True)
+        self.title = ax.set_title('', fontsize=16, fontweight='bold', pad=20)
+        self.title.set_animated(True)
+        self._animated = [self.markers, self.arrow, self.direction_text, self.ladybug, self.title]
+
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _marker_style(self, visited_positions, last_position):
+        colors = []
+        sizes = []
+        for i in range(1, self.num_positions + 1):
+            if i == self.start_position:
+                colors.append('blue')
+                sizes.append(300)
+            elif i == last_position:
+                colors.append('red')
+                sizes.append(300)
+            elif i in visited_positions:
+                colors.append('green')
+                sizes.append(200)
+            else:
+                colors.append('lightgray')
+                sizes.append(100)
+        return colors, sizes
+
+    def render(self, visited_positions, current_position, last_position=None, title="Clock Face",
+               prev_position=None, direction_label=""):
+        """
+        Draw one frame of the clock state.
+
+        Returns:
+            RGBA image as a (height, width, 4) uint8 numpy array
+        """
+        colors, sizes = self._marker_style(visited_positions, last_position)
+        self.markers.set_facecolors(colors)
+        self.markers.set_sizes(sizes)
+
+        cur_x, cur_y = position_xy(current_position, self.num_positions)
+        self.ladybug.set_position((cur_x, cur_y))
+
+        if prev_position is not None:
+            prev_x, prev_y = position_xy(prev_position, self.num_positions)
+            dx = cur_x - prev_x
+            dy = cur_y - prev_y
+            self.arrow.set_data(x=prev_x, y=prev_y, dx=dx*0.7, dy=dy*0.7)
+            self.arrow.set_visible(True)
+            self.direction_text.set_text(direction_label)
+            self.direction_text.set_position(((prev_x + cur_x) / 2, (prev_y + cur_y) / 2 + 0.15))
+            self.direction_text.set_visible(bool(direction_label))
+        else:
+            self.arrow.set_visible(False)
+            self.direction_text.set_visible(False)
+
+        self.title.set_text(title)
+
+        self.canvas.restore_region(self._background)
+        for artist in self._animated:
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+        return np.asarray(self.canvas.buffer_rgba()).copy()
+
+
+class FrameCache:
+    """LRU cache of encoded frame images, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Total size of cached images before the least recently used are dropped
+        """
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached image bytes for key, or None"""
+        with self._lock:
+            data = self._frames.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store image bytes for key, evicting the least recently used frames"""
+        with self._lock:
+            if key in self._frames:
+                self._bytes -= len(self._frames.pop(key))
+            self._frames[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._frames) > 1:
+                _, old = self._frames.popitem(last=False)
+                self._bytes -= len(old)
+
+    def stats(self):
+        """Snapshot of cache usage"""
+        with self._lock:
+            return {
+                'frames': len(self._frames),
+                'mb': self._bytes / 1e6,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class CachedClockRenderer:
+    """
+    Renders clock states to PNG bytes once and serves repeats from a FrameCache.
+
+    A frame is fully determined by the clock size, start, colored positions,
+    current / previous / last position, direction label and title, so those
+    make up the cache key.
+    """
+
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache: FrameCache to use (a new 64 MB one by default)
+        """
+        self.cache = cache if cache is not None else FrameCache()
+        self._animators = {}
+        self._lock = threading.Lock()
+
+    def render_png(self, num_positions, start_position, visited_positions, current_position,
+                   last_position=None, title="Clock Face", prev_position=None, direction_label=""):
+        """
+        PNG bytes of one clock state (arguments as in ClockAnimator.render).
+
+        Returns:
+            PNG-encoded image bytes
+        """
+        visited_mask = 0
+        for pos in visited_positions:
+            visited_mask |= 1 << pos
+        key = (num_positions, start_position, visited_mask, current_position,
+               last_position, prev_position, direction_label, title)
+
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        # Animators are shared between sessions, so only one thread draws at a time
+        with self._lock:
+            animator = self._animators.get((num_positions, start_position))
+            if animator is None:
+                animator = ClockAnimator(num_positions, start_position)
+                self._animators[(num_positions, start_position)] = animator
+            frame = animator.render(visited_positions, current_position, last_position, title,
+                                    prev_position=prev_position, direction_label=direction_label)
+
+        buffer = io.BytesIO()
+        imsave(buffer, frame, format='png')
+        data = buffer.getvalue()
+        self.cache.put(key, data)
+        return data
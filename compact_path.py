@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Compact, bit-packed record of a walk's path.
+
+A walk on the clock is fully described by its start position and one bit per
+step (1 = clockwise, 0 = counterclockwise). CompactPath stores exactly that,
+packed eight steps to a byte with NumPy's packbits, plus the position at
+every CHECKPOINT_INTERVAL-th step. Positions are decoded lazily: random
+access starts from the nearest checkpoint and decodes at most one interval of
+bits, and slices and iteration decode one interval at a time.
+
+A list-based path and directions record costs about 56 bytes per step; this
+costs a little over one bit.
+"""
+
+import random
+from array import array
+
+import numpy as np
+
+from walk_kernel import walk_arc
+
+# Steps between stored positions (a multiple of 8, so checkpoints fall on byte boundaries)
+CHECKPOINT_INTERVAL = 4096
+
+# Number of set bits in every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+_POPCOUNT = _POPCOUNT.astype(np.int64)
+
+
+class CompactPath:
+    """
+    Read-only sequence of the positions of one walk (the start included), so
+    len(record) == steps + 1 and record[i] is the position after i steps.
+    """
+
+    def __init__(self, num_positions, start_position, bits, n_steps,
+                 checkpoint_interval=CHECKPOINT_INTERVAL):
+        """
+        Args:
+            num_positions: Number of positions on the clock
+            start_position: Starting position (1..num_positions)
+            bits: numpy uint8 array of packed step bits (1 = clockwise), as from np.packbits
+            n_steps: Number of steps in the walk
+            checkpoint_interval: Steps between stored positions (a multiple of 8)
+        """
+        if checkpoint_interval <= 0 or checkpoint_interval % 8:
+            raise ValueError("checkpoint_interval must be a positive multiple of 8")
+        self.num_positions = num_positions
+        self.start_position = start_position
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.n_steps = n_steps
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints = self._build_checkpoints()
+
+    @classmethod
+    def from_directions(cls, num_positions, start_position, directions,
+                        checkpoint_interval=CHECKPOINT_INTERVAL):
+        """
+        Pack a sequence of step directions.
+
+        Args:
+            num_positions: Number of positions on the clock
+            start_position: Starting position (1..num_positions)
+            directions: Sequence of +1 (clockwise) / -1 (counterclockwise) steps
+            checkpoint_interval: Steps between stored positions
+
+        Returns:
+            CompactPath
+        """
+        directions = np.asarray(directions, dtype=np.int8)
+        return cls(num_positions, start_position, np.packbits(directions > 0), len(directions),
+                   checkpoint_interval)
+
+    def _build_checkpoints(self):
+        # checkpoints[c] = position after c * checkpoint_interval steps
+        interval = self.checkpoint_interval
+        full = self.n_steps // interval
+        per_interval = self.bits[:full * interval // 8].reshape(full, interval // 8)
+        net_cw = 2 * _POPCOUNT[per_interval].sum(axis=1) - interval
+        offsets = np.concatenate([[0], np.cumsum(net_cw)])
+        dtype = np.uint16 if self.num_positions < 1 << 16 else np.uint32
+        return ((self.start_position - 1 + offsets) % self.num_positions + 1).astype(dtype)
+
+    def __len__(self):
+        return self.n_steps + 1
+
+    @property
+    def nbytes(self):
+        """Memory used by the packed bits and checkpoints"""
+        return self.bits.nbytes + self.checkpoints.nbytes
+
+    @property
+    def last_position(self):
+        """Position after the final step"""
+        return self.position(self.n_steps)
+
+    def directions(self, start=0, stop=None):
+        """
+        Decode the directions of steps start..stop-1.
+
+        Returns:
+            numpy int8 array of +1 / -1
+        """
+        if stop is None:
+            stop = self.n_steps
+        if stop <= start:
+            return np.zeros(0, dtype=np.int8)
+        first_byte = start // 8
+        unpacked = np.unpackbits(self.bits[first_byte:(stop + 7) // 8])
+        step_bits = unpacked[start - first_byte * 8:stop - first_byte * 8]
+        return step_bits.astype(np.int8) * 2 - 1
+
+    def position(self, index):
+        """Position after `index` steps, decoded from the nearest checkpoint"""
+        if not 0 <= index <= self.n_steps:
+            raise IndexError("path index out of range")
+        checkpoint = index // self.checkpoint_interval
+        first_step = checkpoint * self.checkpoint_interval
+        net_cw = int(self.directions(first_step, index).sum())
+        return (int(self.checkpoints[checkpoint]) - 1 + net_cw) % self.num_positions + 1
+
+    def positions(self, start=0, stop=None):
+        """
+        Decode the positions after start..stop-1 steps.
+
+        Returns:
+            numpy array of positions
+        """
+        if stop is None:
+            stop = len(self)
+        if stop <= start:
+            return np.zeros(0, dtype=self.checkpoints.dtype)
+        first = self.position(start)
+        offsets = np.concatenate([[0], np.cumsum(self.directions(start, stop - 1), dtype=np.int64)])
+        return ((first - 1 + offsets) % self.num_positions + 1).astype(self.checkpoints.dtype)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step < 0:
+                return self.positions(stop + 1, start + 1)[::step]
+            return self.positions(start, stop)[::step]
+        if index < 0:
+            index += len(self)
+        return self.position(index)
+
+    def __iter__(self):
+        for start in range(0, len(self), self.checkpoint_interval):
+            for position in self.positions(start, min(start + self.checkpoint_interval, len(self))):
+                yield int(position)
+
+    def to_lists(self):
+        """Expand into the (path, directions) lists used by LadybugSimulator.simulate"""
+        return self.positions().tolist(), self.directions().tolist()
+
+
+def record_walk(num_positions=12, start_position=12, clockwise_prob=0.5,
+                end_position=None, steps_limit=None, rng=random):
+    """
+    Run one walk (as walk_arc) and keep its path as a CompactPath.
+
+    Returns:
+        (walk_arc result dictionary, CompactPath)
+    """
+    # array('b') holds one byte per step while the walk runs
+    directions = array('b')
+    walk = walk_arc(num_positions, start_position, clockwise_prob, end_position=end_position,
+                    steps_limit=steps_limit, directions=directions, rng=rng)
+    return walk, CompactPath.from_directions(num_positions, start_position, directions)
+
+
+def save_paths(path, records):
+    """
+    Write many CompactPaths to one .npz file (bits are concatenated, checkpoints are rebuilt on load).
+
+    Args:
+        path: Output file
+        records: Sequence of CompactPath objects
+    """
+    np.savez(
+        path,
+        bits=np.concatenate([r.bits for r in records]) if records else np.zeros(0, dtype=np.uint8),
+        byte_counts=np.array([r.bits.nbytes for r in records], dtype=np.int64),
+        n_steps=np.array([r.n_steps for r in records], dtype=np.int64),
+        num_positions=np.array([r.num_positions for r in records], dtype=np.int64),
+        start_positions=np.array([r.start_position for r in records], dtype=np.int64)
+    )
+
+
+def load_paths(path, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """
+    Read CompactPaths written by save_paths.
+
+    Returns:
+        List of CompactPath objects (their bits are views into one shared array)
+    """
+    data = np.load(path)
+    ends = np.cumsum(data["byte_counts"])
+    starts = ends - data["byte_counts"]
+    bits = data["bits"]
+    return [
+        CompactPath(int(n), int(s), bits[a:b], int(steps), checkpoint_interval)
+        for n, s, a, b, steps in zip(data["num_positions"], data["start_positions"],
+                                     starts, ends, data["n_steps"])
+    ]
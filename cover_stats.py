@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Cover-time statistics for the Ladybug Clock Problem.
+
+Runs blocks of walks with the vectorized batch engine and, instead of keeping
+only the last position, builds compact histograms:
+
+- joint_counts[k, t]: walks whose last colored position was k and that
+  colored it on step t (so t is the cover time)
+- first_visit_counts[k, t]: walks that first reached position k on step t
+
+Only the sparse events are recorded (a walk first reaching a position, a
+walk finishing) and added into sparse histograms in bulk. Work and memory
+follow the walks and their events, not clock size x longest cover time,
+which for a clock of a few hundred positions would be gigabytes. The exact
+mean and variance of the cover time come from exact_solver.cover_time_moments.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from batch_engine import DEFAULT_CHUNK_SIZE, step_directions
+
+
+# Buffered (position, step) events are added into the histograms once this many pile up
+FLUSH_EVENTS = 1 << 22
+
+
+def _add_events(total, parts, steps):
+    """
+    Add buffered events into a sparse [m, t] histogram and empty the buffers.
+
+    parts[i] holds the offsets m of the events on step steps[i]. The
+    histogram is widened when a step falls beyond its last column.
+    """
+    if not parts:
+        return total
+    offsets = np.concatenate(parts)
+    at_step = np.repeat(steps, [len(part) for part in parts])
+    parts.clear()
+    steps.clear()
+
+    shape = (total.shape[0], max(total.shape[1], int(at_step[-1]) + 1))
+    # Duplicate (m, t) pairs are summed when the matrix is built
+    events = sparse.csr_matrix((np.ones(len(offsets), dtype=np.int64), (offsets, at_step)),
+                               shape=shape)
+    total.resize(shape)
+    return total + events
+
+
+def _cover_events_for_chunk(num_positions, clockwise_prob, n_walks, rng, last_total, visit_total):
+    """
+    Run n_walks walks to full coverage and add them into the histograms.
+
+    Only the sparse events are recorded: a walk first reaching offset m at
+    step t, and a walk finishing on m at step t. They are buffered per step
+    and added in bulk, so a step costs time for the walks still running,
+    not for the whole clock.
+
+    Args:
+        last_total, visit_total: [m, t] histograms (m = offset from the start
+            modulo num_positions) of walks finishing on m at step t and of
+            walks first reaching m at step t
+
+    Returns:
+        The two histograms (scipy CSR matrices), widened as needed
+    """
+    n = num_positions
+    span = n - 1
+    dtype = np.int16 if n < 1 << 14 else np.int32
+
+    offset = np.zeros(n_walks, dtype=dtype)
+    reach_cw = np.zeros(n_walks, dtype=dtype)
+    reach_ccw = np.zeros(n_walks, dtype=dtype)
+
+    visit_total = _add_events(visit_total, [np.zeros(n_walks, dtype=dtype)], [0])
+    if span == 0:
+        last_total = _add_events(last_total, [np.zeros(n_walks, dtype=dtype)], [0])
+        return last_total, visit_total
+
+    # Per step: the offsets reached (visits) or finished on (last), and the step number
+    visits, visit_steps, lasts, last_steps = [], [], [], []
+    buffered = 0
+
+    step = 0
+    while offset.size:
+        step += 1
+        offset += step_directions(rng, offset.size, clockwise_prob)
+        new = (offset > reach_cw) | (offset < reach_ccw)
+        if new.any():
+            np.maximum(reach_cw, offset, out=reach_cw)
+            np.minimum(reach_ccw, offset, out=reach_ccw)
+            visits.append(offset[new] % n)
+            visit_steps.append(step)
+            buffered += len(visits[-1])
+
+            done = (reach_cw - reach_ccw) == span
+            if done.any():
+                lasts.append(offset[done] % n)
+                last_steps.append(step)
+                keep = ~done
+                offset = offset[keep]
+                reach_cw = reach_cw[keep]
+                reach_ccw = reach_ccw[keep]
+
+        if buffered >= FLUSH_EVENTS:
+            visit_total = _add_events(visit_total, visits, visit_steps)
+            last_total = _add_events(last_total, lasts, last_steps)
+            buffered = 0
+
+    visit_total = _add_events(visit_total, visits, visit_steps)
+    last_total = _add_events(last_total, lasts, last_steps)
+    return last_total, visit_total
+
+
+def cover_time_statistics(num_positions=12, start_position=12, clockwise_prob=0.5,
+                          n_simulations=10000, rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run many complete walks and collect cover-time and first-visit histograms.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        n_simulations: Number of walks to run
+        rng: numpy Generator, seed, or None for a fresh unseeded generator
+        chunk_size: Number of walks advanced together in one block
+
+    Returns:
+        Dictionary with
+            'runs': number of walks
+            'joint_counts': (N + 1, T + 1) scipy CSR matrix, entry [k, t]
+                counts walks with last position k and cover time t (row 0 unused)
+            'first_visit_counts': (N + 1, T + 1) scipy CSR matrix, entry
+                [k, t] counts walks that first reached k on step t (row 0 unused)
+            'step_counts': cover-time histogram (joint_counts summed over k)
+            'mean_steps', 'std_steps': sample mean and standard deviation of the cover time
+            'mean_steps_by_last': mean cover time for each last position (nan if never last)
+            'first_visit_mean': mean first-visit step for each position
+    """
+    rng = np.random.default_rng(rng)
+    n = num_positions
+    last_total = sparse.csr_matrix((n, 1), dtype=np.int64)
+    visit_total = sparse.csr_matrix((n, 1), dtype=np.int64)
+
+    remaining = n_simulations
+    while remaining > 0:
+        n_chunk = min(chunk_size, remaining)
+        last_total, visit_total = _cover_events_for_chunk(n, clockwise_prob, n_chunk, rng,
+                                                          last_total, visit_total)
+        remaining -= n_chunk
+
+    # Both histograms end at the longest cover time
+    columns = max(last_total.shape[1], visit_total.shape[1])
+    last_total.resize((n, columns))
+    visit_total.resize((n, columns))
+
+    # Offset m from the start is position start + m; rows become positions, columns steps
+    by_position = np.roll(np.arange(n), start_position - 1)
+    unused_row = sparse.csr_matrix((1, columns), dtype=np.int64)
+    joint = sparse.vstack([unused_row, last_total[by_position]], format='csr')
+    first_visit = sparse.vstack([unused_row, visit_total[by_position]], format='csr')
+
+    steps = np.arange(columns)
+    step_counts = np.asarray(joint.sum(axis=0)).ravel()
+    runs = int(step_counts.sum())
+    mean = float(step_counts @ steps) / runs if runs else float('nan')
+    variance = float(step_counts @ (steps - mean) ** 2) / runs if runs else float('nan')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_by_last = joint @ steps / np.asarray(joint.sum(axis=1)).ravel()
+        first_visit_mean = first_visit @ steps / np.asarray(first_visit.sum(axis=1)).ravel()
+
+    return {
+        'runs': runs,
+        'joint_counts': joint,
+        'first_visit_counts': first_visit,
+        'step_counts': step_counts,
+        'mean_steps': mean,
+        'std_steps': variance ** 0.5,
+        'mean_steps_by_last': mean_by_last,
+        'first_visit_mean': first_visit_mean
+    }
+
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Exact time-resolved coverage probabilities.
+
+How many positions are colored depends only on the colored arc's length and
+where the walker stands inside it, so the coverage process is a Markov chain
+on the states (colored count L, offset i from the arc's counterclockwise end)
+for L = 1..N-1, plus one absorbing "all colored" state: N(N-1)/2 + 1 states
+in all. A probability vector over those states is pushed through a sparse
+transition matrix one step at a time.
+
+The current position does not depend on what has been colored: it is a plain
+biased walk on the cycle, evolved alongside with two array rolls per step.
+
+Once the probability of not yet being fully colored drops below a tolerance,
+every later row is fixed to within that tolerance, so the evolution stops early.
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+def _coverage_transitions(num_positions, clockwise_prob):
+    """
+    Sparse column-stochastic transition matrix over the coverage states.
+
+    State (L, i) has index L(L-1)/2 + i; the absorbing state comes last.
+
+    Returns:
+        Tuple of (transition matrix, colored count of every state)
+    """
+    n = num_positions
+    absorbing = n * (n - 1) // 2
+    lengths = np.repeat(np.arange(1, n), np.arange(1, n))
+    index = np.arange(absorbing)
+    inside = index - lengths * (lengths - 1) // 2
+
+    def state_index(length, offset):
+        return np.where(length >= n, absorbing, length * (length - 1) // 2 + offset)
+
+    # Clockwise: move right inside the arc, or extend it at the clockwise end
+    cw_extends = inside + 1 >= lengths
+    cw_target = state_index(np.where(cw_extends, lengths + 1, lengths),
+                            np.where(cw_extends, lengths, inside + 1))
+    # Counterclockwise: move left inside the arc, or extend it at the other end
+    ccw_extends = inside == 0
+    ccw_target = state_index(np.where(ccw_extends, lengths + 1, lengths),
+                             np.where(ccw_extends, 0, inside - 1))
+
+    rows = np.concatenate([cw_target, ccw_target, [absorbing]])
+    cols = np.concatenate([index, index, [absorbing]])
+    values = np.concatenate([np.full(absorbing, clockwise_prob),
+                             np.full(absorbing, 1.0 - clockwise_prob), [1.0]])
+    matrix = sparse.csr_matrix((values, (rows, cols)), shape=(absorbing + 1, absorbing + 1))
+    return matrix, np.append(lengths, n)
+
+
+def coverage_over_time(num_positions=12, start_position=12, clockwise_prob=0.5,
+                       horizon=1000, tolerance=1e-12):
+    """
+    Exact distribution of the number of colored positions and of the current
+    position after every step up to a horizon.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        horizon: Largest number of steps T to compute
+        tolerance: Stop early once P(not every position colored) is below this
+
+    Returns:
+        Dictionary with
+            'coverage': (T' + 1, N + 1) array, entry [t, k] is P(exactly k
+                positions colored after t steps) (column 0 unused)
+            'positions': (T' + 1, N + 1) array, entry [t, k] is P(the ladybug
+                is at position k after t steps) (column 0 unused)
+            'remaining_mass': P(not every position colored) after each step
+            'steps': T', the last step computed (horizon unless stopped early)
+            'stopped_early': True if the remaining mass fell below tolerance
+    """
+    n = num_positions
+    matrix, colored = _coverage_transitions(n, clockwise_prob)
+
+    state = np.zeros(matrix.shape[0])
+    state[0] = 1.0  # one colored position, standing on it
+    by_offset = np.zeros(n)
+    by_offset[0] = 1.0
+
+    coverage_rows = []
+    position_rows = []
+    stopped_early = False
+    for t in range(horizon + 1):
+        coverage_rows.append(np.bincount(colored, weights=state, minlength=n + 1))
+        position_rows.append(by_offset)
+        if 1.0 - state[-1] < tolerance:
+            stopped_early = t < horizon
+            break
+        if t < horizon:
+            state = matrix @ state
+            by_offset = clockwise_prob * np.roll(by_offset, 1) + (1.0 - clockwise_prob) * np.roll(by_offset, -1)
+
+    coverage = np.array(coverage_rows)
+    positions = np.zeros_like(coverage)
+    # Offset m from the start is position start + m
+    positions[:, 1:] = np.roll(np.array(position_rows), start_position - 1, axis=1)
+
+    return {
+        'coverage': coverage,
+        'positions': positions,
+        'remaining_mass': 1.0 - coverage[:, n],
+        'steps': len(coverage) - 1,
+        'stopped_early': stopped_early
+    }
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Exact answers for the Ladybug Clock Problem.
+
+Position k is the last one colored exactly when the walk reaches both of k's
+neighbours before it reaches k. Unrolling the clock onto a line, k sits at
+offsets m and m - N (m = clockwise distance from the start), and "last = k"
+splits into two gambler's-ruin events:
+
+    reach m-1 before m-N+1, then m-N+1 before m        (clockwise side first)
+    reach m-N+1 before m-1, then m-1 before m-N        (counterclockwise first)
+
+so every P(last = k) costs O(1) and the whole distribution costs O(N), for
+any clockwise_prob.
+
+The cover time (steps until every position is colored) is a sum of such
+gambler's-ruin exit times, which gives its exact mean and variance.
+"""
+
+import numpy as np
+from scipy.linalg import solve_banded
+
+from walk_kernel import exit_ccw_probability, exit_cw_probability, offset_to_position
+
+
+def last_position_distribution(num_positions=12, start_position=12, clockwise_prob=0.5):
+    """
+    Exact probability that each position is the last one colored.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+
+    Returns:
+        numpy array of length num_positions + 1 where entry k is P(last = k)
+        (entry 0 is unused, the start position always gets 0 unless N == 1)
+    """
+    n = num_positions
+    probs = np.zeros(n + 1)
+
+    if n == 1:
+        probs[start_position] = 1.0
+        return probs
+    if n == 2:
+        probs[offset_to_position(n, start_position, 1)] = 1.0
+        return probs
+
+    # Leave a full arc of N-1 positions by its far end, starting next to the other end
+    cross_to_cw = exit_cw_probability(clockwise_prob, 1, n - 1)
+    cross_to_ccw = exit_ccw_probability(clockwise_prob, n - 2, n - 1)
+
+    for m in range(1, n):
+        # Walker at offset 0 inside [m-N+1, m-1]: which neighbour of k comes first?
+        # (each side computed directly: 1 - x would lose probabilities below ~1e-16)
+        cw_first = exit_cw_probability(clockwise_prob, n - 1 - m, n - 2)
+        ccw_first = exit_ccw_probability(clockwise_prob, n - 1 - m, n - 2)
+        prob = cw_first * cross_to_ccw + ccw_first * cross_to_cw
+        probs[offset_to_position(n, start_position, m)] = prob
+
+    return probs
+
+
+def _exit_moments_cw(clockwise_prob, interval_length):
+    """
+    Moments of the time T to leave [0, a] restricted to leaving through a.
+
+    Solves the three tridiagonal first-step equations for every start x:
+        h(x)  = P(exit at a)
+        g1(x) = E[T; exit at a]
+        g2(x) = E[T^2; exit at a]
+
+    Returns:
+        Tuple of three arrays of length a + 1 indexed by the start x
+    """
+    a = interval_length
+    p = clockwise_prob
+    q = 1.0 - p
+    interior = a - 1
+
+    # Banded form of (I - P) on the interior states 1..a-1
+    banded = np.zeros((3, interior))
+    banded[0, 1:] = -p
+    banded[1, :] = 1.0
+    banded[2, :-1] = -q
+
+    def solve(rhs, boundary_at_a):
+        rhs = rhs.copy()
+        rhs[-1] += p * boundary_at_a
+        x = np.zeros(a + 1)
+        x[1:a] = solve_banded((1, 1), banded, rhs)
+        x[a] = boundary_at_a
+        return x
+
+    h = solve(np.zeros(interior), 1.0)
+    def step(f):
+        # Expected value of f one step on, for every interior start
+        return p * f[2:] + q * f[:-2]
+
+    # T = 1 + T' after the first step, so each moment picks up the lower ones
+    g1 = solve(h[1:a], 0.0)
+    g2 = solve(h[1:a] + 2 * step(g1), 0.0)
+    return h, g1, g2
+
+
+def exit_time_moments(clockwise_prob, distance_ccw, interval_length):
+    """
+    Exact mean and variance of the time to leave an interval by either end.
+
+    Args:
+        clockwise_prob: Probability of moving clockwise on each step
+        distance_ccw: Distance from the walker to the counterclockwise exit
+        interval_length: Distance between the two exits
+
+    Returns:
+        Dictionary with the mean, variance and standard deviation of the exit time
+    """
+    i = distance_ccw
+    a = interval_length
+    if i <= 0 or i >= a:
+        return {'mean': 0.0, 'variance': 0.0, 'std': 0.0}
+    _, g1, g2 = _exit_moments_cw(clockwise_prob, a)
+    _, g1_ccw, g2_ccw = _exit_moments_cw(1.0 - clockwise_prob, a)
+    mean = float(g1[i] + g1_ccw[a - i])
+    variance = max(float(g2[i] + g2_ccw[a - i]) - mean * mean, 0.0)
+    return {'mean': mean, 'variance': variance, 'std': variance ** 0.5}
+
+
+def cover_time_moments(num_positions=12, clockwise_prob=0.5):
+    """
+    Exact mean and variance of the number of steps needed to color every position.
+
+    The walk colors positions one at a time; between two new colors it wanders
+    inside the colored arc, a gambler's-ruin interval whose two exits are the
+    uncolored neighbours. Its state at each new color is just (colored count,
+    which end it stands on), so the first two moments follow from a backward
+    recursion over N stages, each solving one small tridiagonal system. The
+    start position does not matter.
+
+    Args:
+        num_positions: Number of positions on the clock
+        clockwise_prob: Probability of moving clockwise on each step
+
+    Returns:
+        Dictionary with the mean, variance and standard deviation of the cover time
+    """
+    n = num_positions
+    # moments[side] = (E[remaining steps], E[remaining steps^2]) standing on that end of the arc
+    moments = {'cw': (0.0, 0.0), 'ccw': (0.0, 0.0)}
+
+    for covered in range(n - 1, 0, -1):
+        a = covered + 1
+        h, g1, g2 = _exit_moments_cw(clockwise_prob, a)
+        h_ccw, g1_ccw, g2_ccw = (f[::-1] for f in _exit_moments_cw(1.0 - clockwise_prob, a))
+
+        next_moments = {}
+        # Standing on the clockwise end puts the walker `covered` steps from the counterclockwise exit
+        for side, i in (('cw', covered), ('ccw', 1)):
+            exits = (
+                (h[i], g1[i], g2[i], moments['cw']),
+                (h_ccw[i], g1_ccw[i], g2_ccw[i], moments['ccw'])
+            )
+            mean = sum(e1 + prob * m1 for prob, e1, e2, (m1, m2) in exits)
+            second = sum(e2 + 2 * e1 * m1 + prob * m2 for prob, e1, e2, (m1, m2) in exits)
+            next_moments[side] = (mean, second)
+        moments = next_moments
+
+    # With one position colored both ends are the start, so either side gives the answer
+    mean, second = (float(x) for x in moments['cw'])
+    variance = max(second - mean * mean, 0.0)
+    return {'mean': mean, 'variance': variance, 'std': variance ** 0.5}
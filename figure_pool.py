@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded pool of matplotlib figures for a long-running dashboard server.
+
+Figures are created as plain matplotlib Figures with their own Agg canvas
+(never through pyplot, so nothing piles up in pyplot's global registry) and
+handed out per chart type. When a chart is done its figure is cleared and
+goes back to the pool for the next chart of the same type. Idle figures are
+closed once the pool goes over its memory cap, and a request for a new figure
+that still does not fit waits until figures in use are given back. Simple
+counters show how the pool is being used.
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DEFAULT_MAX_IDLE_PER_KIND = 4
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+COUNTERS = ("created", "reused", "released", "evicted", "discarded", "waited", "over_cap")
+
+
+def estimate_figure_bytes(figsize, dpi):
+    """Size of the RGBA buffer Agg needs to render a figure"""
+    width, height = figsize
+    return int(width * dpi) * int(height * dpi) * 4
+
+
+class FigurePool:
+    """Reuses a small number of figures per chart type, under a memory cap"""
+
+    def __init__(self, max_idle_per_kind=DEFAULT_MAX_IDLE_PER_KIND, max_bytes=DEFAULT_MAX_BYTES,
+                 dpi=100):
+        """
+        Args:
+            max_idle_per_kind: Idle figures kept for each chart type
+            max_bytes: Estimated memory cap for all pooled figures (idle and in use)
+            dpi: Resolution of pooled figures
+        """
+        self.max_idle_per_kind = max_idle_per_kind
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        # (kind, figsize) -> list of idle figures; OrderedDict keeps eviction order
+        self._idle = OrderedDict()
+        self._in_use = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+        self.counters = {name: 0 for name in COUNTERS}
+
+    def _new_figure(self, figsize):
+        fig = Figure(figsize=figsize, dpi=self.dpi)
+        FigureCanvasAgg(fig)
+        return fig
+
+    def _evict_idle(self, needed_bytes):
+        """Close idle figures (oldest chart type first) until needed_bytes fits under the cap"""
+        while self._bytes + needed_bytes > self.max_bytes and self._idle:
+            key, figures = next(iter(self._idle.items()))
+            fig = figures.pop(0)
+            if not figures:
+                del self._idle[key]
+            self._bytes -= estimate_figure_bytes(key[1], self.dpi)
+            fig.clear()
+            self.counters['evicted'] += 1
+
+    def acquire(self, kind, figsize):
+        """
+        Take a cleared figure for a chart type out of the pool (or create one).
+
+        A new figure that would push the pool over its memory cap blocks until
+        enough figures in use are released. Only a figure that cannot fit even
+        in an empty pool is created over the cap.
+
+        Args:
+            kind: Chart type name, e.g. "clock" or "bar"
+            figsize: Figure size in inches
+
+        Returns:
+            matplotlib Figure with no axes
+        """
+        key = (kind, tuple(float(x) for x in figsize))
+        with self._lock:
+            figures = self._idle.get(key)
+            if figures:
+                fig = figures.pop()
+                if not figures:
+                    del self._idle[key]
+                self.counters['reused'] += 1
+            else:
+                size = estimate_figure_bytes(key[1], self.dpi)
+                self._evict_idle(size)
+                if self._bytes + size > self.max_bytes and self._in_use:
+                    self.counters['waited'] += 1
+                    while self._bytes + size > self.max_bytes and self._in_use:
+                        self._returned.wait()
+                        self._evict_idle(size)
+                if self._bytes + size > self.max_bytes:
+                    # Nothing left to wait for: a single figure larger than the cap
+                    self.counters['over_cap'] += 1
+                self._bytes += size
+                fig = None
+                self.counters['created'] += 1
+            self._in_use += 1
+
+        if fig is None:
+            fig = self._new_figure(key[1])
+        return fig
+
+    def release(self, kind, fig):
+        """Clear a figure and give it back to the pool"""
+        fig.clear()
+        key = (kind, tuple(float(x) for x in fig.get_size_inches()))
+        with self._lock:
+            self._in_use -= 1
+            figures = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(figures) < self.max_idle_per_kind:
+                figures.append(fig)
+            else:
+                self._bytes -= estimate_figure_bytes(key[1], self.dpi)
+                self.counters['discarded'] += 1
+            if not figures:
+                del self._idle[key]
+            self.counters['released'] += 1
+            self._returned.notify_all()
+
+    @contextmanager
+    def figure(self, kind, figsize=(10, 10)):
+        """
+        Borrow a figure with a single axes for the duration of a with-block.
+
+        Usage:
+            with pool.figure("bar", (8, 5)) as (fig, ax):
+                ax.bar(...)
+                st.pyplot(fig)
+        """
+        fig = self.acquire(kind, figsize)
+        try:
+            ax = fig.add_subplot(1, 1, 1)
+            yield fig, ax
+        finally:
+            self.release(kind, fig)
+
+    def stats(self):
+        """Snapshot of pool usage for display or logging"""
+        with self._lock:
+            idle = sum(len(figures) for figures in self._idle.values())
+            return {
+                'in_use': self._in_use,
+                'idle': idle,
+                'estimated_mb': self._bytes / 1e6,
+                'cap_mb': self.max_bytes / 1e6,
+                **self.counters
+            }
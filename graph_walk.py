@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Ladybug walks on arbitrary graphs.
+
+The same question - which vertex is colored last - asked on paths, complete
+graphs, grids, tori or any weighted edge list. A Graph holds its arcs in
+compressed sparse row (CSR) form: the neighbours of vertex v are
+indices[indptr[v]:indptr[v + 1]]. For weighted graphs every vertex also gets
+an alias table (Walker's method, built with Vose's algorithm), so sampling a
+weighted neighbour costs two random numbers and no search.
+
+batch_last_vertex_counts advances a block of walks together. Each walk keeps
+its colored vertices in a bitset (one bit per vertex, packed into uint64
+words), so a block of walks on a large graph stays small.
+
+Vertices are numbered 1..num_vertices, like clock positions. A cycle built by
+cycle_graph is recognised and sent to the clock's own batch engine.
+"""
+
+import random
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+
+from batch_engine import DEFAULT_CHUNK_SIZE, batch_last_position_counts
+from progress import throttled
+from walk_kernel import walk_arc
+
+# Upper bound on the bitset memory of one block of batched walks
+DEFAULT_BITSET_BYTES = 64 * 1024 * 1024
+
+
+def _build_alias_tables(indptr, weights):
+    """
+    Vose's alias method for every vertex's outgoing weights.
+
+    Returns:
+        (alias_prob, alias_slot) arrays aligned with the CSR slots: from slot s
+        keep s with probability alias_prob[s], otherwise jump to alias_slot[s]
+    """
+    alias_prob = np.ones(len(weights))
+    alias_slot = np.arange(len(weights))
+    for v in range(len(indptr) - 1):
+        lo, hi = indptr[v], indptr[v + 1]
+        degree = hi - lo
+        if degree <= 1:
+            continue
+        scaled = weights[lo:hi] * (degree / weights[lo:hi].sum())
+        small = [i for i in range(degree) if scaled[i] < 1.0]
+        large = [i for i in range(degree) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            big = large[-1]
+            alias_prob[lo + s] = scaled[s]
+            alias_slot[lo + s] = lo + big
+            scaled[big] -= 1.0 - scaled[s]
+            if scaled[big] < 1.0:
+                small.append(large.pop())
+        # Leftovers are 1 up to rounding
+        for i in small + large:
+            alias_prob[lo + i] = 1.0
+    return alias_prob, alias_slot
+
+
+class Graph:
+    """Directed, optionally weighted graph in CSR form with per-vertex alias tables"""
+
+    def __init__(self, num_vertices, sources, targets, weights=None):
+        """
+        Args:
+            num_vertices: Number of vertices (numbered 1..num_vertices)
+            sources: Sequence of arc tails (1-based)
+            targets: Sequence of arc heads (1-based)
+            weights: Sequence of positive arc weights (None for unweighted);
+                a walker leaves a vertex along each arc with probability
+                proportional to its weight
+        """
+        sources = np.asarray(sources, dtype=np.int64) - 1
+        targets = np.asarray(targets, dtype=np.int64) - 1
+        if len(sources) and (min(sources.min(), targets.min()) < 0
+                             or max(sources.max(), targets.max()) >= num_vertices):
+            raise ValueError("Arc endpoints must be between 1 and num_vertices")
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+            if np.any(weights <= 0):
+                raise ValueError("Arc weights must be positive")
+
+        order = np.argsort(sources, kind="stable")
+        self.num_vertices = num_vertices
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=num_vertices))])
+        self.indices = targets[order]
+        self.degree = np.diff(self.indptr)
+        self.weighted = weights is not None
+        if self.weighted:
+            self.weights = weights[order]
+            self.alias_prob, self.alias_slot = _build_alias_tables(self.indptr, self.weights)
+        # Set by cycle_graph so the clock can take its fast path
+        self.cycle_prob = None
+
+    @classmethod
+    def from_edges(cls, num_vertices, edges, weights=None, directed=False):
+        """
+        Build a graph from an edge list.
+
+        Args:
+            num_vertices: Number of vertices (numbered 1..num_vertices)
+            edges: Sequence of (u, v) pairs
+            weights: Optional sequence of edge weights
+            directed: If False every edge can be walked both ways (with the same weight)
+
+        Returns:
+            Graph
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        sources, targets = edges[:, 0], edges[:, 1]
+        if not directed:
+            sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+            if weights is not None:
+                weights = np.concatenate([weights, weights])
+        return cls(num_vertices, sources, targets, weights)
+
+    def neighbours(self, vertex):
+        """Vertices reachable in one step from vertex (1-based)"""
+        return self.indices[self.indptr[vertex - 1]:self.indptr[vertex]] + 1
+
+    def check_coverable(self, start_vertex):
+        """
+        Raise ValueError unless a walk from start_vertex is sure to color
+        every vertex: every vertex must be reachable from the start, and the
+        graph strongly connected, so no walk can get stuck in a part that
+        misses some vertices.
+        """
+        if np.any(self.degree == 0) and self.num_vertices > 1:
+            raise ValueError("Every vertex needs at least one outgoing arc")
+        matrix = sparse.csr_matrix((np.ones(len(self.indices)), self.indices, self.indptr),
+                                   shape=(self.num_vertices, self.num_vertices))
+        reached = breadth_first_order(matrix, start_vertex - 1, directed=True,
+                                      return_predecessors=False)
+        if len(reached) < self.num_vertices:
+            raise ValueError(f"Only {len(reached)} of {self.num_vertices} vertices "
+                             f"can be reached from vertex {start_vertex}")
+        n_components, _ = connected_components(matrix, directed=True, connection='strong')
+        if n_components > 1:
+            raise ValueError(f"The graph splits into {n_components} strongly connected parts, "
+                             f"so a walk can get stuck before coloring every vertex")
+
+    def sample_next(self, current, u1, u2):
+        """
+        Vectorized neighbour sampling.
+
+        Args:
+            current: Array of 0-based current vertices
+            u1, u2: Arrays of uniform random numbers in [0, 1)
+
+        Returns:
+            Array of 0-based next vertices
+        """
+        slot = self.indptr[current] + (u1 * self.degree[current]).astype(np.int64)
+        if self.weighted:
+            slot = np.where(u2 < self.alias_prob[slot], slot, self.alias_slot[slot])
+        return self.indices[slot]
+
+
+def cycle_graph(num_vertices=12, clockwise_prob=0.5):
+    """The clock: vertex v steps to v + 1 with probability clockwise_prob, else to v - 1"""
+    vertices = np.arange(1, num_vertices + 1)
+    clockwise = vertices % num_vertices + 1
+    counterclockwise = (vertices - 2) % num_vertices + 1
+    weights = None
+    if clockwise_prob != 0.5:
+        weights = np.concatenate([np.full(num_vertices, clockwise_prob),
+                                  np.full(num_vertices, 1.0 - clockwise_prob)])
+        # Zero-probability moves are simply left out
+        keep = weights > 0
+    else:
+        keep = np.ones(2 * num_vertices, dtype=bool)
+    sources = np.concatenate([vertices, vertices])[keep]
+    targets = np.concatenate([clockwise, counterclockwise])[keep]
+    graph = Graph(num_vertices, sources, targets, None if weights is None else weights[keep])
+    graph.cycle_prob = clockwise_prob
+    return graph
+
+
+def path_graph(num_vertices):
+    """Vertices 1..n in a line"""
+    vertices = np.arange(1, num_vertices)
+    return Graph.from_edges(num_vertices, np.column_stack([vertices, vertices + 1]))
+
+
+def complete_graph(num_vertices):
+    """Every vertex joined to every other vertex"""
+    u, v = np.triu_indices(num_vertices, k=1)
+    return Graph.from_edges(num_vertices, np.column_stack([u + 1, v + 1]))
+
+
+def _grid_edges(rows, cols, wrap):
+    index = np.arange(rows * cols).reshape(rows, cols) + 1
+    right = np.roll(index, -1, axis=1)
+    down = np.roll(index, -1, axis=0)
+    if not wrap:
+        right = right[:, :-1]
+        down = down[:-1, :]
+    edges = [np.column_stack([index[:, :right.shape[1]].ravel(), right.ravel()]),
+             np.column_stack([index[:down.shape[0], :].ravel(), down.ravel()])]
+    return np.concatenate(edges)
+
+
+def grid_graph(rows, cols):
+    """rows x cols grid; vertex (r, c) is numbered r * cols + c + 1"""
+    return Graph.from_edges(rows * cols, _grid_edges(rows, cols, wrap=False))
+
+
+def torus_graph(rows, cols):
+    """rows x cols grid with wrap-around edges"""
+    return Graph.from_edges(rows * cols, _grid_edges(rows, cols, wrap=True))
+
+
+def walk_graph(graph, start_vertex=1, rng=random):
+    """
+    Run one walk until every vertex is colored.
+
+    Args:
+        graph: Graph to walk on (ValueError unless every vertex is reachable
+            from the start)
+        start_vertex: Starting vertex (1-based)
+        rng: Object with a random() method (the random module by default)
+
+    Returns:
+        Dictionary with the last vertex colored and the number of steps
+    """
+    graph.check_coverable(start_vertex)
+    if graph.cycle_prob is not None:
+        walk = walk_arc(graph.num_vertices, start_vertex, graph.cycle_prob, rng=rng)
+        return {'last_position': walk['last_position'], 'steps': walk['steps']}
+
+    rand = rng.random
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    if graph.weighted:
+        alias_prob = graph.alias_prob.tolist()
+        alias_slot = graph.alias_slot.tolist()
+
+    visited = bytearray(graph.num_vertices)
+    current = start_vertex - 1
+    visited[current] = 1
+    uncolored = graph.num_vertices - 1
+    steps = 0
+    while uncolored:
+        lo = indptr[current]
+        slot = lo + int(rand() * (indptr[current + 1] - lo))
+        if graph.weighted and rand() >= alias_prob[slot]:
+            slot = alias_slot[slot]
+        current = indices[slot]
+        steps += 1
+        if not visited[current]:
+            visited[current] = 1
+            uncolored -= 1
+
+    return {'last_position': current + 1, 'steps': steps}
+
+
+def _last_vertices_for_chunk(graph, start_vertex, n_walks, rng):
+    """Run n_walks walks to full coverage, tracking colored vertices in per-walk bitsets"""
+    n = graph.num_vertices
+    words = (n + 63) // 64
+    rows = np.arange(n_walks)
+
+    current = np.full(n_walks, start_vertex - 1, dtype=np.int64)
+    bitsets = np.zeros((n_walks, words), dtype=np.uint64)
+    bitsets[:, current[0] >> 6] = np.uint64(1) << np.uint64(current[0] & 63)
+    uncolored = np.full(n_walks, n - 1, dtype=np.int64)
+
+    finished = []
+    while current.size:
+        u2 = rng.random(current.size) if graph.weighted else None
+        current = graph.sample_next(current, rng.random(current.size), u2)
+
+        word = current >> 6
+        bit = np.uint64(1) << (current & 63).astype(np.uint64)
+        row_words = bitsets[rows, word]
+        new = (row_words & bit) == 0
+        bitsets[rows[new], word[new]] = row_words[new] | bit[new]
+        uncolored -= new
+
+        done = uncolored == 0
+        if done.any():
+            finished.append(current[done])
+            keep = ~done
+            current = current[keep]
+            bitsets = bitsets[keep]
+            uncolored = uncolored[keep]
+            rows = np.arange(current.size)
+
+    if not finished:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(finished) + 1
+
+
+def batch_last_vertex_counts(graph, start_vertex=1, n_simulations=10000, rng=None,
+                             chunk_size=DEFAULT_CHUNK_SIZE, max_bitset_bytes=DEFAULT_BITSET_BYTES,
+                             progress=None):
+    """
+    Run many walks at once and count the last vertex colored.
+
+    Args:
+        graph: Graph to walk on
+        start_vertex: Starting vertex (1-based)
+        n_simulations: Number of walks to run
+        rng: numpy Generator, seed, or None for a fresh unseeded generator
+        chunk_size: Largest number of walks advanced together in one block
+        max_bitset_bytes: Cap on the bitset memory of one block (large
+            graphs get smaller blocks)
+        progress: Optional callback(walks_done, n_simulations), called between
+            blocks at most progress.DEFAULT_MAX_RATE times a second
+
+    Returns:
+        numpy array of length num_vertices + 1 where entry k is the number of
+        walks whose last colored vertex was k (entry 0 is unused)
+    """
+    n = graph.num_vertices
+    if graph.cycle_prob is not None:
+        # The clock keeps its dedicated arc engine
+        return batch_last_position_counts(n, start_vertex, graph.cycle_prob, n_simulations,
+                                          rng=rng, chunk_size=chunk_size, progress=progress)
+
+    graph.check_coverable(start_vertex)
+    rng = np.random.default_rng(rng)
+    progress = throttled(progress)
+    counts = np.zeros(n + 1, dtype=np.int64)
+    if n == 1:
+        counts[start_vertex] = n_simulations
+        return counts
+
+    bytes_per_walk = 8 * ((n + 63) // 64)
+    chunk_size = max(1, min(chunk_size, max_bitset_bytes // bytes_per_walk))
+    remaining = n_simulations
+    while remaining > 0:
+        n_chunk = min(chunk_size, remaining)
+        last = _last_vertices_for_chunk(graph, start_vertex, n_chunk, rng)
+        counts += np.bincount(last, minlength=n + 1)
+        remaining -= n_chunk
+        if progress is not None:
+            progress(n_simulations - remaining, n_simulations)
+    return counts
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+End-position (hitting-time) mode: the walk stops as soon as it reaches a
+chosen end position.
+
+Unrolled onto a line, the end position sits at offsets m and m - N from the
+start (m = its clockwise distance), so reaching it is leaving the interval
+[m - N, m] - a gambler's-ruin problem. That gives exact answers:
+
+- the hitting-time distribution, by evolving the probability of every
+  interior offset one step at a time (O(N) per step),
+- its exact mean and variance,
+- the number of positions colored at the hit: on hitting m, the colored arc
+  reaches back to the furthest counterclockwise offset -j seen before, and
+  P(that is exactly j) is a difference of two gambler's-ruin probabilities,
+- the probability that everything is colored first (the end is the last
+  position colored).
+
+batch_hitting_statistics runs the same mode for many walks at once with the
+vectorized batch engine.
+"""
+
+import numpy as np
+
+from batch_engine import DEFAULT_CHUNK_SIZE, step_directions
+from exact_solver import exit_time_moments
+from walk_kernel import exit_cw_probability
+
+
+def _end_offsets(num_positions, start_position, end_position):
+    """Clockwise and counterclockwise offsets of the end position from the start"""
+    end_cw = (end_position - start_position) % num_positions
+    return end_cw, end_cw - num_positions
+
+
+def exact_hitting_statistics(num_positions=12, start_position=12, end_position=6,
+                             clockwise_prob=0.5, horizon=100000, tolerance=1e-12):
+    """
+    Exact statistics of a walk that stops on reaching end_position.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        end_position: Position that stops the walk (must differ from start_position)
+        clockwise_prob: Probability of moving clockwise on each step
+        horizon: Largest number of steps in the hitting-time distribution
+        tolerance: Stop the distribution early once the mass still walking is below this
+
+    Returns:
+        Dictionary with
+            'step_probs': P(hit on step t) for t = 0..T'
+            'remaining_mass': P(not hit yet) after step T'
+            'mean_steps', 'std_steps': exact mean and standard deviation of the hitting time
+            'colored_probs': length N + 1 array, entry k is P(k positions colored at the hit)
+            'cover_first_prob': P(every position colored when the end is reached)
+    """
+    if end_position == start_position:
+        raise ValueError("end_position must differ from start_position")
+
+    n = num_positions
+    p = clockwise_prob
+    q = 1.0 - p
+    end_cw, end_ccw = _end_offsets(n, start_position, end_position)
+
+    # Hitting-time distribution over the interior offsets end_ccw+1..end_cw-1
+    walking = np.zeros(n - 1)
+    walking[-end_ccw - 1] = 1.0
+    step_probs = [0.0]
+    for _ in range(horizon):
+        if walking.sum() < tolerance:
+            break
+        step_probs.append(p * walking[-1] + q * walking[0])
+        moved = np.zeros_like(walking)
+        moved[1:] += p * walking[:-1]
+        moved[:-1] += q * walking[1:]
+        walking = moved
+
+    moments = exit_time_moments(p, -end_ccw, n)
+
+    # Colored count at the hit
+    colored = np.zeros(n + 1)
+    # Hit at end_cw after reaching back exactly j counterclockwise (0 <= j < -end_ccw)
+    reach_back = [1.0] + [1.0 - exit_cw_probability(p, j, end_cw + j) for j in range(1, -end_ccw + 1)]
+    for j in range(-end_ccw):
+        colored[end_cw + j + 1] += reach_back[j] - reach_back[j + 1]
+    # Hit at end_ccw after reaching exactly r clockwise (0 <= r < end_cw)
+    reach_on = [1.0] + [exit_cw_probability(p, -end_ccw, r - end_ccw) for r in range(1, end_cw + 1)]
+    for r in range(end_cw):
+        colored[-end_ccw + r + 1] += reach_on[r] - reach_on[r + 1]
+
+    return {
+        'step_probs': np.array(step_probs),
+        'remaining_mass': float(walking.sum()),
+        'mean_steps': moments['mean'],
+        'std_steps': moments['std'],
+        'colored_probs': colored,
+        'cover_first_prob': float(colored[n])
+    }
+
+
+def _hitting_rows_for_chunk(num_positions, end_cw, end_ccw, clockwise_prob, n_walks, rng):
+    """
+    Run n_walks walks until they reach the end offsets or color everything.
+
+    Returns:
+        Tuple of (walks stopping at each step, (N + 1)-length counts of colored
+        positions at the stop, N-length counts of the stopping offset modulo N)
+    """
+    n = num_positions
+    span = n - 1
+    dtype = np.int16 if n < 1 << 14 else np.int32
+
+    offset = np.zeros(n_walks, dtype=dtype)
+    reach_cw = np.zeros(n_walks, dtype=dtype)
+    reach_ccw = np.zeros(n_walks, dtype=dtype)
+
+    stopped = [0]
+    colored = np.zeros(n + 1, dtype=np.int64)
+    stop_offsets = np.zeros(n, dtype=np.int64)
+    if span == 0:
+        # A single position is colored from the start
+        stopped[0] = n_walks
+        colored[1] = n_walks
+        stop_offsets[0] = n_walks
+        return np.array(stopped), colored, stop_offsets
+
+    while offset.size:
+        offset += step_directions(rng, offset.size, clockwise_prob)
+        np.maximum(reach_cw, offset, out=reach_cw)
+        np.minimum(reach_ccw, offset, out=reach_ccw)
+
+        width = reach_cw - reach_ccw
+        done = (offset == end_cw) | (offset == end_ccw) | (width == span)
+        stopped.append(int(np.count_nonzero(done)))
+        if stopped[-1]:
+            colored += np.bincount(width[done] + 1, minlength=n + 1)
+            stop_offsets += np.bincount(offset[done] % n, minlength=n)
+            keep = ~done
+            offset = offset[keep]
+            reach_cw = reach_cw[keep]
+            reach_ccw = reach_ccw[keep]
+
+    return np.array(stopped, dtype=np.int64), colored, stop_offsets
+
+
+def batch_hitting_statistics(num_positions=12, start_position=12, end_position=6,
+                             clockwise_prob=0.5, n_simulations=10000, rng=None,
+                             chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run many walks that stop on reaching end_position (or on coloring
+    everything, as walk_arc does) and collect their statistics.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        end_position: Position that stops the walk (a return to the start
+            counts when it equals start_position)
+        clockwise_prob: Probability of moving clockwise on each step
+        n_simulations: Number of walks to run
+        rng: numpy Generator, seed, or None for a fresh unseeded generator
+        chunk_size: Number of walks advanced together in one block
+
+    Returns:
+        Dictionary with
+            'runs': number of walks
+            'step_counts': histogram of the stopping step
+            'colored_counts': length N + 1 array of colored counts at the stop
+            'last_counts': length N + 1 array of stopping positions
+            'mean_steps', 'std_steps': sample mean and standard deviation of the stopping step
+            'cover_first_prob': fraction of walks that colored everything by the stop
+    """
+    rng = np.random.default_rng(rng)
+    n = num_positions
+    end_cw, end_ccw = _end_offsets(n, start_position, end_position)
+
+    step_counts = np.zeros(1, dtype=np.int64)
+    colored = np.zeros(n + 1, dtype=np.int64)
+    stop_offsets = np.zeros(n, dtype=np.int64)
+    remaining = n_simulations
+    while remaining > 0:
+        n_chunk = min(chunk_size, remaining)
+        chunk_steps, chunk_colored, chunk_offsets = _hitting_rows_for_chunk(
+            n, end_cw, end_ccw, clockwise_prob, n_chunk, rng
+        )
+        if len(chunk_steps) > len(step_counts):
+            step_counts = np.pad(step_counts, (0, len(chunk_steps) - len(step_counts)))
+        step_counts[:len(chunk_steps)] += chunk_steps
+        colored += chunk_colored
+        stop_offsets += chunk_offsets
+        remaining -= n_chunk
+
+    # Offset m from the start is position start + m
+    last_counts = np.zeros(n + 1, dtype=np.int64)
+    last_counts[1:] = np.roll(stop_offsets, start_position - 1)
+
+    runs = int(step_counts.sum())
+    steps = np.arange(len(step_counts))
+    mean = float(step_counts @ steps) / runs if runs else float('nan')
+    variance = float(step_counts @ (steps - mean) ** 2) / runs if runs else float('nan')
+
+    return {
+        'runs': runs,
+        'step_counts': step_counts,
+        'colored_counts': colored,
+        'last_counts': last_counts,
+        'mean_steps': mean,
+        'std_steps': variance ** 0.5,
+        'cover_first_prob': colored[n] / runs if runs else float('nan')
+    }
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed lookup table of exact last-position distributions.
+
+An offline build step fills a table over a grid of clock sizes N and
+clockwise probabilities p using the exact solver, and writes it as a plain
+.npy file that is memory-mapped at load time. Only start position N is
+stored: turning the clock maps every other start onto it, so a lookup for
+any start is just a rotation. Probabilities between grid points are
+linearly interpolated.
+
+Build it with:
+    python lookup_table.py --build
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from exact_solver import last_position_distribution
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ladybug_lookup.npy")
+
+DEFAULT_MIN_N = 1
+DEFAULT_MAX_N = 48
+DEFAULT_P_STEPS = 1000  # p grid spacing of 0.001
+
+
+def _grid_path(table_path):
+    return os.path.splitext(table_path)[0] + "_grid.npz"
+
+
+def build_lookup_table(path=DEFAULT_TABLE_PATH, min_n=DEFAULT_MIN_N, max_n=DEFAULT_MAX_N,
+                       p_steps=DEFAULT_P_STEPS):
+    """
+    Fill the table and write it to disk.
+
+    Args:
+        path: Output .npy file (a small _grid.npz file is written next to it)
+        min_n: Smallest clock size in the table
+        max_n: Largest clock size in the table
+        p_steps: Number of intervals in the clockwise_prob grid over [0, 1]
+
+    Returns:
+        Path of the written table
+    """
+    sizes = np.arange(min_n, max_n + 1)
+    probs = np.linspace(0.0, 1.0, p_steps + 1)
+
+    # table[i, j, m] = P(last position is m steps clockwise of the start | N = sizes[i], p = probs[j])
+    table = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64,
+                                      shape=(len(sizes), len(probs), max_n))
+    for i, n in enumerate(sizes):
+        for j, p in enumerate(probs):
+            # Start at N, so offset m is simply position m
+            dist = last_position_distribution(int(n), int(n), float(p))
+            table[i, j, :n] = np.roll(dist[1:], 1)
+            table[i, j, n:] = 0.0
+    table.flush()
+    del table
+
+    np.savez(_grid_path(path), sizes=sizes, probs=probs)
+    return path
+
+
+class LookupTable:
+    """Memory-mapped table of exact distributions, answering queries by lookup and interpolation"""
+
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        """
+        Args:
+            path: Table written by build_lookup_table
+        """
+        self.table = np.load(path, mmap_mode="r")
+        grid = np.load(_grid_path(path))
+        self.sizes = grid["sizes"]
+        self.probs = grid["probs"]
+        self._size_index = {int(n): i for i, n in enumerate(self.sizes)}
+
+    def covers(self, num_positions, clockwise_prob=0.5):
+        """True if the table holds this clock size and probability range"""
+        return (num_positions in self._size_index
+                and self.probs[0] <= clockwise_prob <= self.probs[-1])
+
+    def distribution(self, num_positions=12, start_position=12, clockwise_prob=0.5):
+        """
+        Look up P(last = k) for every position.
+
+        Args:
+            num_positions: Number of positions on the clock (must be in the table)
+            start_position: Starting position (1..num_positions)
+            clockwise_prob: Probability of moving clockwise on each step
+
+        Returns:
+            numpy array of length num_positions + 1 where entry k is P(last = k)
+        """
+        if not self.covers(num_positions, clockwise_prob):
+            raise KeyError(f"Lookup table has no entry for N={num_positions}, p={clockwise_prob}")
+
+        rows = self.table[self._size_index[num_positions]]
+        j = int(np.searchsorted(self.probs, clockwise_prob, side="right")) - 1
+        j = min(max(j, 0), len(self.probs) - 2)
+        weight = (clockwise_prob - self.probs[j]) / (self.probs[j + 1] - self.probs[j])
+        by_offset = (1 - weight) * rows[j, :num_positions] + weight * rows[j + 1, :num_positions]
+
+        # Offset m from the start is position start + m
+        probs = np.zeros(num_positions + 1)
+        probs[1:] = np.roll(by_offset, start_position - 1)
+        return probs
+
+
+def load_lookup_table(path=DEFAULT_TABLE_PATH):
+    """Open the lookup table if it has been built, otherwise return None"""
+    if not (os.path.exists(path) and os.path.exists(_grid_path(path))):
+        return None
+    return LookupTable(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Ladybug Clock lookup table")
+    parser.add_argument("--build", action="store_true", help="Build the table")
+    parser.add_argument("--path", default=DEFAULT_TABLE_PATH, help="Output .npy file")
+    parser.add_argument("--min-n", type=int, default=DEFAULT_MIN_N, help="Smallest clock size")
+    parser.add_argument("--max-n", type=int, default=DEFAULT_MAX_N, help="Largest clock size")
+    parser.add_argument("--p-steps", type=int, default=DEFAULT_P_STEPS,
+                        help="Number of clockwise_prob grid intervals over [0, 1]")
+    args = parser.parse_args()
+
+    if not args.build:
+        parser.print_help()
+        return
+
+    path = build_lookup_table(args.path, args.min_n, args.max_n, args.p_steps)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"Wrote {path} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
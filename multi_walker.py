@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Several ladybugs on one clock, sharing the colors.
+
+A replicate is one run of K walkers. All walkers of all replicates in a block
+move together as a (replicates, K) NumPy array, and each replicate keeps one
+shared coverage row: a position is colored the first time any of its
+walkers lands on it, and the run ends when the row is full.
+
+Each walker can have its own clockwise probability. Steps can also be
+correlated: with probability `correlation` all walkers of a replicate use
+the same random number on a step (a common shock), otherwise each draws its
+own. Every walker's own steps keep their clockwise_prob either way.
+
+When the last positions are colored on the same step by different walkers,
+one of them is picked at random as "the last" and the tie is counted.
+"""
+
+import numpy as np
+
+from batch_engine import DEFAULT_CHUNK_SIZE
+
+
+def _as_walker_array(value, num_walkers, dtype):
+    """Broadcast a scalar or per-walker sequence to one entry per walker"""
+    array = np.asarray(value, dtype=dtype)
+    if array.ndim == 0:
+        return np.full(num_walkers, array, dtype=dtype)
+    if len(array) != num_walkers:
+        raise ValueError(f"Expected one value per walker ({num_walkers}), got {len(array)}")
+    return array
+
+
+def _multi_walker_chunk(num_positions, starts, walker_probs, correlation, n_runs, rng):
+    """
+    Run n_runs replicates of K walkers to full shared coverage.
+
+    Returns:
+        Tuple of (last positions, cover steps, number of tied finishes)
+    """
+    n = num_positions
+    k = len(starts)
+    dtype = np.int16 if n < 1 << 14 else np.int32
+    position = np.tile(starts - 1, (n_runs, 1)).astype(dtype)  # 0-based
+    covered = np.zeros((n_runs, n), dtype=bool)
+    covered[np.arange(n_runs)[:, None], position] = True
+    colored = covered.sum(axis=1)
+
+    run_index = np.arange(n_runs)
+    last = np.zeros(n_runs, dtype=np.int64)
+    steps = np.zeros(n_runs, dtype=np.int64)
+    ties = 0
+
+    # Replicates that start fully colored (N = 1, or K walkers on every position)
+    done = colored == n
+    last[done] = position[done, 0] + 1
+    keep = ~done
+    position, covered, colored, run_index = position[keep], covered[keep], colored[keep], run_index[keep]
+
+    step = 0
+    while run_index.size:
+        step += 1
+        active = run_index.size
+        draws = rng.random((active, k))
+        if correlation > 0:
+            shared = rng.random(active) < correlation
+            draws[shared] = rng.random((int(shared.sum()), 1))
+        position += (draws < walker_probs).view(np.int8) * 2 - 1
+        position[position == n] = 0
+        position[position < 0] = n - 1
+
+        # Flat indices into the coverage rows (cheaper than paired fancy indexing)
+        cells = np.arange(0, active * n, n)[:, None] + position
+        new = ~covered.reshape(-1)[cells]
+        # Distinct newly colored positions per replicate: two walkers may reach
+        # the same new position on one step, which counts once
+        candidates = np.sort(np.where(new, position, -1), axis=1)
+        distinct = candidates >= 0
+        distinct[:, 1:] &= candidates[:, 1:] != candidates[:, :-1]
+        covered.reshape(-1)[cells[new]] = True
+        colored += distinct.sum(axis=1)
+
+        finished = colored == n
+        if finished.any():
+            # One random key per distinct final position; the largest is "the last"
+            final = distinct[finished]
+            ties += int(np.count_nonzero(final.sum(axis=1) > 1))
+            pick = np.where(final, rng.random(final.shape), -1.0).argmax(axis=1)
+            last[run_index[finished]] = candidates[finished][np.arange(len(pick)), pick] + 1
+            steps[run_index[finished]] = step
+            # np.take along rows copies much faster than boolean-mask indexing of 2-D arrays
+            keep = np.flatnonzero(~finished)
+            position = np.take(position, keep, axis=0)
+            covered = np.take(covered, keep, axis=0)
+            colored = colored[keep]
+            run_index = run_index[keep]
+
+    return last, steps, ties
+
+
+def multi_walker_statistics(num_positions=12, start_positions=12, num_walkers=2,
+                            clockwise_prob=0.5, correlation=0.0, n_simulations=10000,
+                            rng=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run many replicates of K ladybugs sharing one clock.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_positions: Starting position of every walker, or one per walker
+        num_walkers: Number of ladybugs K
+        clockwise_prob: Clockwise probability of every walker, or one per walker
+        correlation: Probability that all walkers share one random number on a step
+        n_simulations: Number of replicates
+        rng: numpy Generator, seed, or None for a fresh unseeded generator
+        chunk_size: Walker-steps advanced together (replicates per block = chunk_size // K)
+
+    Returns:
+        Dictionary with
+            'runs': number of replicates
+            'last_counts': length N + 1 array counting the last position colored
+            'step_counts': histogram of the cover time (steps taken by each walker)
+            'mean_steps', 'std_steps': sample mean and standard deviation of the cover time
+            'tied_finishes': replicates whose final step colored several positions at once
+    """
+    if not 0.0 <= correlation <= 1.0:
+        raise ValueError("correlation must be between 0 and 1")
+    rng = np.random.default_rng(rng)
+    n = num_positions
+    starts = _as_walker_array(start_positions, num_walkers, np.int64)
+    walker_probs = _as_walker_array(clockwise_prob, num_walkers, np.float64)
+
+    last_counts = np.zeros(n + 1, dtype=np.int64)
+    step_counts = np.zeros(1, dtype=np.int64)
+    ties = 0
+    runs_per_block = max(1, chunk_size // num_walkers)
+    remaining = n_simulations
+    while remaining > 0:
+        n_block = min(runs_per_block, remaining)
+        last, steps, block_ties = _multi_walker_chunk(n, starts, walker_probs, correlation,
+                                                      n_block, rng)
+        last_counts += np.bincount(last, minlength=n + 1)
+        block_steps = np.bincount(steps)
+        if len(block_steps) > len(step_counts):
+            step_counts = np.pad(step_counts, (0, len(block_steps) - len(step_counts)))
+        step_counts[:len(block_steps)] += block_steps
+        ties += block_ties
+        remaining -= n_block
+
+    runs = int(step_counts.sum())
+    step_axis = np.arange(len(step_counts))
+    mean = float(step_counts @ step_axis) / runs if runs else float('nan')
+    variance = float(step_counts @ (step_axis - mean) ** 2) / runs if runs else float('nan')
+    return {
+        'runs': runs,
+        'last_counts': last_counts,
+        'step_counts': step_counts,
+        'mean_steps': mean,
+        'std_steps': variance ** 0.5,
+        'tied_finishes': ties
+    }
+
+
+def walker_count_sweep(walker_counts, num_positions=12, start_position=12, clockwise_prob=0.5,
+                       correlation=0.0, n_simulations=10000, rng=None):
+    """
+    How the answers change as ladybugs are added.
+
+    Args:
+        walker_counts: Sequence of K values
+        Other arguments as in multi_walker_statistics (one shared start and p)
+
+    Returns:
+        Dictionary with 'walker_counts', 'last_probs' (one row of P(last = k)
+        per K) and 'mean_steps' (mean cover time per K)
+    """
+    rng = np.random.default_rng(rng)
+    last_probs = []
+    mean_steps = []
+    for k in walker_counts:
+        stats = multi_walker_statistics(num_positions, start_position, k, clockwise_prob,
+                                        correlation, n_simulations, rng=rng)
+        last_probs.append(stats['last_counts'] / stats['runs'])
+        mean_steps.append(stats['mean_steps'])
+    return {
+        'walker_counts': np.asarray(walker_counts),
+        'last_probs': np.array(last_probs),
+        'mean_steps': np.array(mean_steps)
+    }
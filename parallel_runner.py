@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Process-pool execution of many Ladybug Clock walks.
+
+The runs are split into a fixed number of chunks. Each chunk gets its own
+independent random stream spawned from one master seed, and the per-chunk
+counts are simply added together. The chunk layout depends only on the run
+count and the worker count, so a given (seed, workers) pair always gives the
+same counts, no matter which process finishes first.
+"""
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from batch_engine import batch_last_position_counts
+from progress import throttled
+from walk_kernel import walk_arc, walk_events
+
+ENGINES = ("batch", "step", "event")
+
+# Chunks handed out per worker, so a slow chunk doesn't leave the others idle
+CHUNKS_PER_WORKER = 4
+
+
+def _run_chunk(engine, num_positions, start_position, clockwise_prob, n_runs, seed_seq):
+    """Run one chunk of walks on its own random stream and return its bincount"""
+    if engine == "batch":
+        return batch_last_position_counts(num_positions, start_position, clockwise_prob,
+                                          n_runs, rng=np.random.default_rng(seed_seq))
+
+    rng = random.Random(int(seed_seq.generate_state(1, np.uint64)[0]))
+    walk = walk_events if engine == "event" else walk_arc
+    counts = np.zeros(num_positions + 1, dtype=np.int64)
+    for _ in range(n_runs):
+        counts[walk(num_positions, start_position, clockwise_prob, rng=rng)['last_position']] += 1
+    return counts
+
+
+def split_runs(num_runs, n_chunks):
+    """Split num_runs into n_chunks sizes that differ by at most one"""
+    base, extra = divmod(num_runs, n_chunks)
+    return [base + (1 if i < extra else 0) for i in range(n_chunks)]
+
+
+def parallel_last_position_counts(num_positions=12, start_position=12, clockwise_prob=0.5,
+                                  num_runs=10000, seed=None, workers=None, engine="batch",
+                                  on_chunk=None):
+    """
+    Run many walks across a process pool and count the last position colored.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        num_runs: Number of walks to run
+        seed: Master seed (int) or None for a fresh random one
+        workers: Number of worker processes (defaults to the CPU count);
+            1 runs everything in this process with the same chunk layout
+        engine: "batch" (vectorized NumPy), "step" or "event" per-walk kernels
+        on_chunk: Optional progress callback(runs_done, num_runs) called as
+            chunks finish, at most progress.DEFAULT_MAX_RATE times a second
+
+    Returns:
+        numpy array of length num_positions + 1 with the count for each position
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+    workers = workers or os.cpu_count() or 1
+
+    sizes = [n for n in split_runs(num_runs, workers * CHUNKS_PER_WORKER) if n > 0]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(engine, num_positions, start_position, clockwise_prob, n, s)
+             for n, s in zip(sizes, seeds)]
+
+    counts = np.zeros(num_positions + 1, dtype=np.int64)
+    runs_done = 0
+    on_chunk = throttled(on_chunk)
+
+    if workers == 1:
+        for task in tasks:
+            counts += _run_chunk(*task)
+            runs_done += task[4]
+            if on_chunk is not None:
+                on_chunk(runs_done, num_runs)
+        return counts
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_chunk, *task): task[4] for task in tasks}
+        for future in as_completed(futures):
+            # Integer addition is order independent, so completion order can't change the result
+            counts += future.result()
+            runs_done += futures[future]
+            if on_chunk is not None:
+                on_chunk(runs_done, num_runs)
+
+    return counts
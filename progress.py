@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Progress reporting for long simulation runs.
+
+The simulators take a `progress` callback, progress(done, total), and call
+it between chunks of work, never per walk. They wrap it in ThrottledProgress
+so a reporter hears at most DEFAULT_MAX_RATE updates a second however fast
+the chunks finish, plus the final update. Redrawing a progress bar or
+printing a line then costs the same at 1,000 runs as at 10,000,000.
+
+Each front end plugs in its own reporter: console_reporter for the command
+line, notebook_reporter for Jupyter, and a progress bar in the Streamlit
+dashboard.
+"""
+
+import sys
+import time
+
+DEFAULT_MAX_RATE = 10  # updates per second
+
+
+class ThrottledProgress:
+    """Forward progress(done, total) to a reporter at most max_rate times a second"""
+
+    def __init__(self, reporter, max_rate=DEFAULT_MAX_RATE, clock=time.monotonic):
+        self.reporter = reporter
+        self.min_interval = 1.0 / max_rate
+        self._clock = clock
+        self._last = None
+
+    def __call__(self, done, total):
+        now = self._clock()
+        # The first and the final update always go through
+        if self._last is None or done >= total or now - self._last >= self.min_interval:
+            self._last = now
+            self.reporter(done, total)
+
+
+def throttled(progress, max_rate=DEFAULT_MAX_RATE):
+    """
+    Wrap a progress callback in ThrottledProgress.
+
+    Returns:
+        None for None, the callback itself if it is already throttled
+    """
+    if progress is None or isinstance(progress, ThrottledProgress):
+        return progress
+    return ThrottledProgress(progress, max_rate)
+
+
+def console_reporter(stream=None, label="simulations"):
+    """Reporter that prints "Completed done / total simulations..." lines to stream (stdout)"""
+    def report(done, total):
+        print(f"Completed {done:,} / {total:,} {label}...", file=stream or sys.stdout, flush=True)
+    return report
+
+
+def notebook_reporter(label="simulations"):
+    """Reporter that updates one line of a Jupyter cell's output in place (needs IPython)"""
+    from IPython.display import display
+
+    handle = display(f"Completed 0 {label}", display_id=True)
+
+    def report(done, total):
+        handle.update(f"Completed {done:,} / {total:,} {label}")
+    return report
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Rare-event estimates of P(last = k) for strongly biased walks.
+
+With clockwise_prob near 0 or 1 the walk almost always sweeps straight
+around, and most positions are last with probabilities like 1e-16 that plain
+sampling never sees. Here each target position gets its own tilted walks,
+reweighted by the likelihood ratio.
+
+Take p > 1/2 and a target m steps clockwise of the start. For m to be last,
+the walk has to color everything counterclockwise of the start down to
+m + 1 - N, d = N - 1 - m steps against the drift, before it ever reaches m.
+The tilt that makes that cheap is the gambler's-ruin one: swap p and 1 - p
+until the counterclockwise reach first gets to depth d, then walk with p
+again, since from there the drift is what finishes the job. Every walk that
+ends with m last has the same likelihood ratio, ((1 - p) / p)^d, because the
+swapped steps it took add up to exactly d counterclockwise. So the estimate
+is that constant times a success rate under the tilt, and the success rate
+is not small. For p < 1/2 the picture is mirrored.
+
+Walks for every target run together as one vectorized block, each carrying
+its own target, and stop as soon as they color their target. Targets get
+more walks until each reaches the requested relative standard error, as
+sequential_mc does for absolute width.
+"""
+
+import numpy as np
+
+
+def _tilted_hits(num_positions, clockwise_prob, targets, rng):
+    """
+    Run one tilted walk per entry of targets (clockwise offsets 1..N-1) until
+    it colors its target.
+
+    Returns:
+        Boolean array, True where the target was the last position colored
+    """
+    n = num_positions
+    span = n - 1
+    p = clockwise_prob
+    dtype = np.int16 if n < 1 << 14 else np.int32
+
+    # The side swept against the drift, and how far, before the tilt ends
+    depth = np.where(p >= 0.5, span - targets, targets - 1)
+    swapped_prob = 1.0 - p
+
+    index = np.arange(len(targets))
+    hit = np.zeros(len(targets), dtype=bool)
+    offset = np.zeros(len(targets), dtype=dtype)
+    reach_cw = np.zeros_like(offset)
+    reach_ccw = np.zeros_like(offset)
+    target_cw = targets.astype(dtype)
+    target_ccw = (targets - n).astype(dtype)
+    while index.size:
+        tilted = np.where(p >= 0.5, -reach_ccw, reach_cw) < depth
+        step_prob = np.where(tilted, swapped_prob, p)
+        clockwise = rng.random(index.size) < step_prob
+        offset += clockwise.view(np.int8) * 2 - 1
+        np.maximum(reach_cw, offset, out=reach_cw)
+        np.minimum(reach_ccw, offset, out=reach_ccw)
+
+        done = (offset == target_cw) | (offset == target_ccw)
+        if done.any():
+            hit[index[done]] = (reach_cw[done] - reach_ccw[done]) == span
+            keep = ~done
+            index = index[keep]
+            offset = offset[keep]
+            reach_cw = reach_cw[keep]
+            reach_ccw = reach_ccw[keep]
+            target_cw = target_cw[keep]
+            target_ccw = target_ccw[keep]
+            depth = depth[keep]
+    return hit
+
+
+def _rate_rel_error(hits, walks):
+    """
+    Relative standard error of success rates, sqrt((1 - h) / (h w)), with
+    h = (hits + 1) / (walks + 2) so that all-success targets still show an error.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = (hits + 1.0) / (walks + 2.0)
+        return np.where(hits > 0, np.sqrt((1.0 - rate) / (rate * walks)), np.inf)
+
+
+def rare_event_last_position(num_positions=12, start_position=12, clockwise_prob=0.99,
+                             rel_tol=0.1, chunk_size=10000, max_walks=10_000_000, seed=None):
+    """
+    Estimate every P(last = k), tiny ones included, to a relative standard
+    error by importance sampling with a tilted clockwise probability.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        rel_tol: Stop once every tracked estimate's standard error is below
+            this fraction of the estimate
+        chunk_size: Smallest number of walks run between checks
+        max_walks: Give up after this many walks
+        seed: Seed for the random stream
+
+    Returns:
+        Dictionary with
+            'probs': length N + 1 array of estimated P(last = k) (entry 0 unused)
+            'std_error', 'rel_error': standard error, and the same relative to the estimate
+            'walks': walks spent on each position
+            'runs': total walks
+            'naive_runs': plain walks that would give each estimate its relative error
+            'speedup': naive_runs of the hardest tracked position over runs
+            'converged': True if every tracked position reached rel_tol
+
+        Positions with a likelihood ratio of zero (all but one under p = 0
+        or 1) are exactly 0 and not tracked, nor is the start.
+    """
+    n = num_positions
+    p = clockwise_prob
+    rng = np.random.default_rng(seed)
+
+    targets = np.arange(1, n)
+    depth = np.where(p >= 0.5, n - 1 - targets, targets - 1)
+    ratio = min(p, 1.0 - p) / max(p, 1.0 - p)
+    weight = ratio ** depth
+    tracked = weight > 0
+
+    hits = np.zeros(n - 1, dtype=np.int64)
+    walks = np.zeros(n - 1, dtype=np.int64)
+    per_target = np.where(tracked, max(1, chunk_size // max(int(tracked.sum()), 1)), 0)
+    while per_target.sum() > 0:
+        budget = max_walks - int(walks.sum())
+        if per_target.sum() > budget:
+            per_target = per_target * budget // per_target.sum()
+            if per_target.sum() == 0:
+                break
+        chunk_targets = np.repeat(targets, per_target)
+        hit = _tilted_hits(n, p, chunk_targets, rng)
+        hits += np.bincount(chunk_targets[hit] - 1, minlength=n - 1)
+        walks += per_target
+
+        rel_error = _rate_rel_error(hits, walks)
+        pending = tracked & ~(rel_error <= rel_tol)
+        if not pending.any():
+            break
+        # Predict the walks that reach rel_tol; double the walks of targets with no hits yet
+        needed = np.where(hits > 0, np.ceil(walks * (rel_error / rel_tol) ** 2), 2 * walks)
+        per_target = np.where(pending, np.maximum(needed - walks, per_target), 0).astype(np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimate = np.where(tracked & (walks > 0), weight * hits / walks, 0.0)
+        rel_error = np.where(tracked & (estimate > 0), _rate_rel_error(hits, walks), np.nan)
+        std_error = np.nan_to_num(estimate * rel_error)
+        naive_runs = np.where(tracked, (1.0 - estimate) / (estimate * rel_error ** 2), np.nan)
+    runs = int(walks.sum())
+    converged = bool(np.all(rel_error[tracked] <= rel_tol))
+    hardest = float(np.nanmax(naive_runs)) if np.isfinite(naive_runs).any() else 0.0
+
+    # Offset m from the start is position start + m; offset 0 (the start) gets start_value
+    def by_position(values, start_value):
+        by_offset = np.concatenate([[start_value], values])
+        result = np.zeros(n + 1, dtype=by_offset.dtype)
+        result[1:] = np.roll(by_offset, start_position - 1)
+        return result
+
+    return {
+        'probs': by_position(estimate, 1.0 if n == 1 else 0.0),
+        'std_error': by_position(std_error, 0.0),
+        'rel_error': by_position(rel_error, np.nan),
+        'walks': by_position(walks, 0),
+        'runs': runs,
+        'naive_runs': by_position(naive_runs, np.nan),
+        'speedup': hardest / runs if runs else float('nan'),
+        'converged': converged
+    }
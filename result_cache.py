@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Two-tier cache for simulation results.
+
+Results are keyed on the simulation parameters
+(num_positions, start_position, end_position, clockwise_prob, n, seed) and on
+the source that produced them, so different ways of getting n runs (a fresh
+batch, an accumulator's stream) never share an entry.
+Recently used results stay in memory (LRU). Results that can be reproduced
+(seeded runs) are also written to disk so they survive restarts and are
+shared by every session of the app; unseeded runs stay in memory only.
+The disk tier is bounded too: past max_disk_entries files the least recently
+used ones (by modification time, refreshed on every disk hit) are deleted.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ladybug_cache")
+DEFAULT_MAX_DISK_ENTRIES = 4096  # about 1 MB of 12-position count arrays
+
+
+def make_key(num_positions, start_position, end_position, clockwise_prob, n, seed=None,
+             source="batch"):
+    """
+    Build a cache key; clockwise_prob is rounded so slider float noise can't split entries.
+
+    source names what produced the result (e.g. "batch" or "accumulator"),
+    since the same parameters can come from different random streams.
+    """
+    return (int(num_positions), int(start_position),
+            None if end_position is None else int(end_position),
+            round(float(clockwise_prob), 12), int(n),
+            None if seed is None else int(seed), str(source))
+
+
+class ResultCache:
+    """In-memory LRU cache of count arrays backed by an on-disk store"""
+
+    def __init__(self, max_entries=256, cache_dir=DEFAULT_CACHE_DIR,
+                 max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        """
+        Args:
+            max_entries: Number of results kept in memory
+            cache_dir: Directory for the on-disk tier, or None to keep memory only
+            max_disk_entries: Number of result files kept on disk; the oldest
+                by modification time are deleted beyond it
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.npy")
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, persist=True):
+        """Return the cached counts for key, or None (persist=False skips the disk tier)"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        if persist and self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                value = np.load(path)
+                # A hit makes the file recent again, so eviction drops unused results first
+                os.utime(path)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, persist=True):
+        """Store counts for key in memory and, if persist, on disk"""
+        value = np.asarray(value)
+        with self._lock:
+            self._remember(key, value)
+
+        if persist and self.cache_dir is not None:
+            # Write to a temporary file first so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, value)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete the least recently used result files beyond max_disk_entries"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".npy")]
+        except OSError:
+            return
+        excess = len(entries) - self.max_disk_entries
+        if excess <= 0:
+            return
+
+        def mtime(entry):
+            try:
+                return entry.stat().st_mtime
+            except OSError:
+                return 0.0
+        for entry in sorted(entries, key=mtime)[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                # Another session may have evicted it already
+                pass
+
+    def get_or_compute(self, key, compute, persist=True):
+        """
+        Return the cached counts for key, calling compute() to fill a miss.
+
+        With persist=False the disk tier is neither read nor written.
+        """
+        value = self.get(key, persist)
+        if value is None:
+            value = np.asarray(compute())
+            self.put(key, value, persist)
+        return value
+
+    def clear(self, disk=False):
+        """Drop every in-memory entry (and the on-disk files if disk=True)"""
+        with self._lock:
+            self._memory.clear()
+        if disk and self.cache_dir is not None:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Sequential Monte Carlo for the Ladybug Clock Problem.
+
+Instead of picking a run count up front, walks are run in chunks while a
+confidence interval is kept for every P(last = k). Sampling stops as soon as
+the widest interval is narrower than the requested tolerance.
+"""
+
+import numpy as np
+from scipy import stats
+
+from batch_engine import batch_last_position_counts
+
+METHODS = ("wilson", "clopper-pearson")
+
+
+def wilson_interval(counts, n, confidence=0.95):
+    """
+    Wilson score interval for binomial proportions.
+
+    Args:
+        counts: Success counts (scalar or numpy array)
+        n: Number of trials
+        confidence: Two-sided confidence level
+
+    Returns:
+        (lower, upper) arrays
+    """
+    counts = np.asarray(counts, dtype=float)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    phat = counts / n
+    denom = 1 + z * z / n
+    center = (phat + z * z / (2 * n)) / denom
+    half = z * np.sqrt(phat * (1 - phat) / n + z * z / (4 * n * n)) / denom
+    return np.clip(center - half, 0.0, 1.0), np.clip(center + half, 0.0, 1.0)
+
+
+def clopper_pearson_interval(counts, n, confidence=0.95):
+    """
+    Exact (Clopper-Pearson) interval for binomial proportions.
+
+    Args:
+        counts: Success counts (scalar or numpy array)
+        n: Number of trials
+        confidence: Two-sided confidence level
+
+    Returns:
+        (lower, upper) arrays
+    """
+    counts = np.asarray(counts, dtype=float)
+    alpha = 1 - confidence
+    lower = np.where(counts > 0, stats.beta.ppf(alpha / 2, counts, n - counts + 1), 0.0)
+    upper = np.where(counts < n, stats.beta.ppf(1 - alpha / 2, counts + 1, n - counts), 1.0)
+    return lower, upper
+
+
+def _interval(method, counts, n, confidence):
+    if method == "wilson":
+        return wilson_interval(counts, n, confidence)
+    if method == "clopper-pearson":
+        return clopper_pearson_interval(counts, n, confidence)
+    raise ValueError(f"Unknown interval method {method!r}, expected one of {METHODS}")
+
+
+def run_until_precision(num_positions=12, start_position=12, clockwise_prob=0.5,
+                        tolerance=0.005, confidence=0.95, method="wilson",
+                        chunk_size=10000, max_runs=100_000_000, seed=None):
+    """
+    Run walks in chunks until every P(last = k) interval is narrower than tolerance.
+
+    After each chunk the runs still needed are predicted from the normal
+    approximation, so the next chunk goes most of the way in one step.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        tolerance: Stop once the widest interval is narrower than this
+        confidence: Two-sided confidence level of the intervals
+        method: "wilson" or "clopper-pearson"
+        chunk_size: Smallest number of walks run between checks
+        max_runs: Give up after this many walks
+        seed: Seed for the random stream
+
+    Returns:
+        Dictionary with the counts, runs used, per-position lower/upper
+        bounds, the widest interval width and whether the tolerance was met
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown interval method {method!r}, expected one of {METHODS}")
+
+    rng = np.random.default_rng(seed)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    counts = np.zeros(num_positions + 1, dtype=np.int64)
+    # The start position can never be last (unless it is the only one), so skip it
+    tracked = [k for k in range(1, num_positions + 1)
+               if k != start_position or num_positions == 1]
+    runs = 0
+    next_chunk = chunk_size
+
+    while True:
+        next_chunk = min(next_chunk, max_runs - runs)
+        counts += batch_last_position_counts(num_positions, start_position, clockwise_prob,
+                                             next_chunk, rng=rng)
+        runs += next_chunk
+
+        lower, upper = _interval(method, counts[tracked], runs, confidence)
+        max_width = float(np.max(upper - lower))
+        converged = max_width < tolerance
+        if converged or runs >= max_runs:
+            break
+
+        # Width ~ 2z*sqrt(p(1-p)/n), so predict the total n that reaches the tolerance
+        phat = counts[tracked] / runs
+        needed = int(np.ceil((2 * z / tolerance) ** 2 * np.max(phat * (1 - phat))))
+        next_chunk = max(chunk_size, needed - runs)
+
+    lower_all = np.zeros(num_positions + 1)
+    upper_all = np.zeros(num_positions + 1)
+    lower_all[tracked] = lower
+    upper_all[tracked] = upper
+
+    return {
+        'counts': counts,
+        'runs': runs,
+        'lower': lower_all,
+        'upper': upper_all,
+        'max_width': max_width,
+        'converged': converged
+    }
@@ -5,15 +5,34 @@ A beautiful, interactive dashboard that visualizes and solves the famous Ladybug
 """
 
 import streamlit as st
-import random
 import numpy as np
-import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from matplotlib.patches import Circle, FancyArrowPatch, Wedge
+from matplotlib.patches import FancyArrowPatch, Wedge
 from matplotlib.lines import Line2D
 import seaborn as sns
-from collections import defaultdict
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from accumulator import AccumulatorStore
+from batch_engine import batch_last_position_counts, counts_to_dict, counts_from_dict
+from clock_renderer import CachedClockRenderer
+from compact_path import CompactPath, record_walk
+from cover_stats import cover_time_statistics
+from coverage_dp import coverage_over_time
+from exact_solver import cover_time_moments, last_position_distribution
+from figure_pool import FigurePool
+from hitting_time import batch_hitting_statistics, exact_hitting_statistics
+from lookup_table import load_lookup_table
+from multi_walker import multi_walker_statistics, walker_count_sweep
+from parallel_runner import parallel_last_position_counts
+from progress import throttled
+from rare_event import rare_event_last_position
+from result_cache import ResultCache, make_key
+from sequential_mc import run_until_precision
+from sweep import parameter_sweep, sweep_to_npz_bytes
+from variance_reduction import default_remaining, variance_reduced_last_position
+from walk_export import FORMATS as EXPORT_FORMATS, MIME_TYPES, export_walk, ffmpeg_path
+from walk_kernel import walk_arc, walk_events, iter_walk, arc_positions, path_from_directions
 
 # Set page config
 st.set_page_config(
@@ -60,144 +79,12 @@ class LadybugClockVisualizer:
         self.num_positions = num_positions
         self.start_position = start_position
         
-    def create_clock_figure(self, visited_positions, current_position, last_position=None, title="Clock Face", prev_position=None, direction_label=""):
-        """Create clock visualization with annotations"""
-        fig, ax = plt.subplots(1, 1, figsize=(10, 10))
-        
-        # Draw circle
-        circle = Circle((0, 0), 1, fill=False, edgecolor='black', linewidth=2)
-        ax.add_patch(circle)
-        
-        # Draw hour positions
-        for i in range(1, self.num_positions + 1):
-            angle = np.pi/2 - i * 2 * np.pi / self.num_positions
-            x = np.cos(angle)
-            y = np.sin(angle)
-            
-            # Color coding
-            if i == self.start_position:
-                color = 'blue'
-                marker_size = 300
-            elif i == last_position:
-                color = 'red'
-                marker_size = 300
-            elif i in visited_positions:
-                color = 'green'
-                marker_size = 200
-            else:
-                color = 'lightgray'
-                marker_size = 100
-            
-            # Draw marker
-            ax.scatter(x, y, s=marker_size, c=color, zorder=5, alpha=0.7, edgecolors='black', linewidth=2)
-            
-            # Label
-            label_x = x * 1.2
-            label_y = y * 1.2
-            ax.text(label_x, label_y, str(i), fontsize=14, ha='center', va='center', fontweight='bold')
-        
-        # Draw arrow from previous position to current position
-        if prev_position is not None:
-            prev_angle = np.pi/2 - prev_position * 2 * np.pi / self.num_positions
-            curr_angle = np.pi/2 - current_position * 2 * np.pi / self.num_positions
-            
-            prev_x = np.cos(prev_angle)
-            prev_y = np.sin(prev_angle)
-            curr_x = np.cos(curr_angle)
-            curr_y = np.sin(curr_angle)
-            
-            # Draw arrow
-            dx = curr_x - prev_x
-            dy = curr_y - prev_y
-            ax.arrow(prev_x, prev_y, dx*0.7, dy*0.7, head_width=0.1, head_length=0.08, 
-                    fc='orange', ec='orange', linewidth=2.5, zorder=8, alpha=0.8)
-            
-            # Add direction label
-            if direction_label:
-                mid_x = (prev_x + curr_x) / 2
-                mid_y = (prev_y + curr_y) / 2
-                ax.text(mid_x, mid_y + 0.15, direction_label, fontsize=11, ha='center', 
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7),
-                       fontweight='bold', zorder=9)
-        
-        # Draw current position highlight
-        current_angle = np.pi/2 - current_position * 2 * np.pi / self.num_positions
-        x = np.cos(current_angle)
-        y = np.sin(current_angle)
-        ax.text(x, y, 'L', fontsize=40, ha='center', va='center', zorder=10, color='red', fontweight='bold')
-        
-        # Add legend
-        from matplotlib.patches import Patch
-        legend_elements = [
-            Patch(facecolor='blue', edgecolor='black', label='Start (12)'),
-            Patch(facecolor='green', edgecolor='black', label='Visited'),
-            Patch(facecolor='lightgray', edgecolor='black', label='Not Visited'),
-            Patch(facecolor='red', edgecolor='black', label='Last Position')
-        ]
-        ax.legend(handles=legend_elements, loc='upper left', fontsize=10)
-        
-        ax.set_xlim(-1.5, 1.5)
-        ax.set_ylim(-1.5, 1.5)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        
-        return fig
-    
-    def create_step_by_step_figure(self, path, visited_positions, last_position, title="Simulation Path"):
-        """Create figure showing the path"""
-        fig, ax = plt.subplots(1, 1, figsize=(12, 10))
-        
-        # Draw circle
-        circle = Circle((0, 0), 1, fill=False, edgecolor='black', linewidth=2)
-        ax.add_patch(circle)
-        
-        # Draw positions
-        for i in range(1, 13):
-            angle = np.pi/2 - i * 2 * np.pi / 12
-            x = np.cos(angle)
-            y = np.sin(angle)
-            
-            if i == 12:
-                color = 'blue'
-                size = 300
-            elif i == last_position:
-                color = 'red'
-                size = 300
-            elif i in visited_positions:
-                color = 'green'
-                size = 200
-            else:
-                color = 'lightgray'
-                size = 100
-            
-            ax.scatter(x, y, s=size, c=color, zorder=5, alpha=0.7, edgecolors='black', linewidth=2)
-            label_x = x * 1.2
-            label_y = y * 1.2
-            ax.text(label_x, label_y, str(i), fontsize=14, ha='center', va='center', fontweight='bold')
-        
-        # Draw path
-        for j in range(len(path) - 1):
-            start_pos = path[j]
-            end_pos = path[j + 1]
-            
-            start_angle = np.pi/2 - start_pos * 2 * np.pi / 12
-            end_angle = np.pi/2 - end_pos * 2 * np.pi / 12
-            
-            start_x = np.cos(start_angle)
-            start_y = np.sin(start_angle)
-            end_x = np.cos(end_angle)
-            end_y = np.sin(end_angle)
-            
-            ax.plot([start_x, end_x], [start_y, end_y], 'k-', alpha=0.3, linewidth=1)
-        
-        ax.set_xlim(-1.5, 1.5)
-        ax.set_ylim(-1.5, 1.5)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        
-        return fig
+    def render_clock_png(self, visited_positions, current_position, last_position=None, title="Clock Face", prev_position=None, direction_label=""):
+        """PNG bytes of a clock state, rendered once and then served from the shared frame cache"""
+        return get_frame_renderer().render_png(
+            self.num_positions, self.start_position, visited_positions, current_position,
+            last_position, title, prev_position=prev_position, direction_label=direction_label
+        )
 
 
 class LadybugSimulator:
@@ -210,52 +97,293 @@ class LadybugSimulator:
         self.counter_clockwise_prob = 1 - clockwise_prob
         self.end_position = end_position  # Stop when this position is reached
     
-    def simulate(self, steps_limit=None):
-        """Run one complete simulation"""
-        current_pos = self.start_position
-        visited = {current_pos}
-        path = [current_pos]
-        directions = []  # Track directions for annotation
-        reached_end = False
-        
-        while len(visited) < self.num_positions:
-            # Choose direction based on probability
-            if random.random() < self.clockwise_prob:
-                direction = 1  # Clockwise
-            else:
-                direction = -1  # Counter-clockwise
-            
-            current_pos = ((current_pos - 1 + direction) % self.num_positions) + 1
-            visited.add(current_pos)
-            path.append(current_pos)
-            directions.append(direction)
-            
-            # Check if we reached the ending position
-            if self.end_position is not None and current_pos == self.end_position:
-                reached_end = True
-                break
-            
-            if steps_limit and len(path) > steps_limit:
-                break
+    def simulate(self, steps_limit=None, compact=False):
+        """
+        Run one complete simulation.
+        
+        With compact=True the path is kept as a bit-packed CompactPath under
+        'record' instead of the 'path' and 'directions' lists.
+        """
+        if compact:
+            walk, record = record_walk(
+                self.num_positions, self.start_position, self.clockwise_prob,
+                end_position=self.end_position, steps_limit=steps_limit
+            )
+        else:
+            directions = []  # Track directions for annotation
+            walk = walk_arc(
+                self.num_positions, self.start_position, self.clockwise_prob,
+                end_position=self.end_position, steps_limit=steps_limit,
+                directions=directions
+            )
+        visited = set(arc_positions(self.num_positions, self.start_position,
+                                    walk['reach_cw'], walk['reach_ccw']))
+        
+        result = {
+            'last_position': walk['last_position'],
+            'visited': visited,
+            'steps': walk['steps'],
+            'reached_end': walk['reached_end']
+        }
+        if compact:
+            result['record'] = record
+        else:
+            result['path'] = path_from_directions(self.num_positions, self.start_position, directions)
+            result['directions'] = directions
+        return result
+    
+    def iter_steps(self, steps_limit=None):
+        """Stream one simulation step by step (see walk_kernel.iter_walk)"""
+        return iter_walk(self.num_positions, self.start_position, self.clockwise_prob,
+                         end_position=self.end_position, steps_limit=steps_limit)
+    
+    def simulate_events(self, count_steps=False):
+        """Run one simulation by jumping between arc exits (no path is recorded)"""
+        walk = walk_events(
+            self.num_positions, self.start_position, self.clockwise_prob,
+            end_position=self.end_position, count_steps=count_steps
+        )
+        visited = set(arc_positions(self.num_positions, self.start_position,
+                                    walk['reach_cw'], walk['reach_ccw']))
         
         return {
-            'last_position': current_pos,
-            'path': path,
+            'last_position': walk['last_position'],
             'visited': visited,
-            'steps': len(path) - 1,
-            'directions': directions,
-            'reached_end': reached_end
+            'steps': walk['steps'],
+            'reached_end': walk['reached_end']
         }
     
-    def batch_simulate(self, n_simulations):
-        """Run multiple simulations"""
-        results = defaultdict(int)
+    def batch_simulate(self, n_simulations, seed=None, workers=None, estimator=None,
+                       remaining=None, progress=None):
+        """
+        Run multiple simulations (full-coverage walks across `workers` processes if given).
+        
+        With estimator="antithetic" or "conditional" (full-coverage walks only)
+        the result is variance_reduction's dictionary of estimated
+        probabilities and effective-sample-size gain instead of counts
+        (`remaining` sets where "conditional" hands over to the exact answer).
         
-        for _ in range(n_simulations):
-            result = self.simulate()
-            results[result['last_position']] += 1
+        progress(done, total), if given, hears about full-coverage walks and
+        estimator runs as chunks finish, throttled to a few updates a second.
+        """
+        if estimator is not None:
+            if self.end_position is not None:
+                raise ValueError("Variance-reduced estimators need full-coverage walks")
+            return variance_reduced_last_position(
+                self.num_positions, self.start_position, self.clockwise_prob,
+                n_simulations, estimator=estimator, remaining=remaining, rng=seed,
+                progress=progress
+            )
         
-        return results
+        if self.end_position is None:
+            # Full-coverage walks run through the vectorized NumPy engine
+            if workers is not None:
+                counts = parallel_last_position_counts(
+                    self.num_positions, self.start_position, self.clockwise_prob,
+                    n_simulations, seed=seed, workers=workers, on_chunk=progress
+                )
+            else:
+                counts = batch_last_position_counts(
+                    self.num_positions, self.start_position, self.clockwise_prob,
+                    n_simulations, rng=seed, progress=progress
+                )
+            return counts_to_dict(counts)
+        
+        # Walks that stop at end_position run through the vectorized hitting-time engine
+        return counts_to_dict(self.hitting_statistics(n_simulations, seed=seed)['last_counts'])
+    
+    def hitting_statistics(self, n_simulations, seed=None):
+        """Stopping-time and colored-count statistics of walks that stop at end_position"""
+        return batch_hitting_statistics(self.num_positions, self.start_position, self.end_position,
+                                        self.clockwise_prob, n_simulations, rng=seed)
+    
+    def cover_statistics(self, n_simulations, seed=None):
+        """Cover-time and first-visit histograms over n_simulations full-coverage walks"""
+        return cover_time_statistics(self.num_positions, self.start_position, self.clockwise_prob,
+                                     n_simulations, rng=seed)
+    
+    def rare_event_estimate(self, rel_tol=0.1, seed=None):
+        """P(last = k) down to tiny values, by importance sampling with a tilted bias"""
+        return rare_event_last_position(self.num_positions, self.start_position,
+                                        self.clockwise_prob, rel_tol=rel_tol, seed=seed)
+    
+    def multi_walker_statistics(self, num_walkers, n_simulations, correlation=0.0, seed=None):
+        """Last-position and cover-time statistics of num_walkers ladybugs sharing the colors"""
+        return multi_walker_statistics(self.num_positions, self.start_position, num_walkers,
+                                       self.clockwise_prob, correlation, n_simulations, rng=seed)
+
+
+@st.cache_data(max_entries=32)
+def cached_cover_statistics(clockwise_prob, n_simulations, seed=0):
+    """Cover-time statistics for the 12-position clock, shared across reruns"""
+    return LadybugSimulator(clockwise_prob=clockwise_prob).cover_statistics(n_simulations, seed=seed)
+
+
+@st.cache_data(max_entries=32)
+def cached_hitting_statistics(start_position, end_position, clockwise_prob, n_simulations, seed=0):
+    """Hitting-time statistics for the 12-position clock, shared across reruns"""
+    sim = LadybugSimulator(start_position=start_position, end_position=end_position,
+                           clockwise_prob=clockwise_prob)
+    return sim.hitting_statistics(n_simulations, seed=seed)
+
+
+@st.cache_data(max_entries=32)
+def cached_multi_walker_statistics(num_walkers, clockwise_prob, correlation, n_simulations, seed=0):
+    """Statistics of several ladybugs on the 12-position clock, shared across reruns"""
+    sim = LadybugSimulator(clockwise_prob=clockwise_prob)
+    return sim.multi_walker_statistics(num_walkers, n_simulations, correlation=correlation, seed=seed)
+
+
+@st.cache_data(max_entries=16)
+def cached_walker_count_sweep(max_walkers, clockwise_prob, correlation, n_simulations, seed=0):
+    """How the answers change for 1..max_walkers ladybugs, shared across reruns"""
+    return walker_count_sweep(range(1, max_walkers + 1), 12, 12, clockwise_prob, correlation,
+                              n_simulations, rng=seed)
+
+
+@st.cache_data(max_entries=32)
+def cached_variance_reduced(clockwise_prob, n_simulations, estimator, remaining=None, seed=0,
+                            _progress=None):
+    """
+    Variance-reduced P(last = k) for the 12-position clock, shared across reruns
+    (_progress is left out of the cache key)
+    """
+    sim = LadybugSimulator(clockwise_prob=clockwise_prob)
+    return sim.batch_simulate(n_simulations, seed=seed, estimator=estimator, remaining=remaining,
+                              progress=_progress)
+
+
+@st.cache_data(max_entries=32)
+def cached_rare_event_estimate(clockwise_prob, rel_tol, seed=0):
+    """Rare-event P(last = k) for the 12-position clock, shared across reruns"""
+    return LadybugSimulator(clockwise_prob=clockwise_prob).rare_event_estimate(rel_tol, seed=seed)
+
+
+@st.cache_data(max_entries=16)
+def cached_parameter_sweep(p_min, p_max, n_points, start_position, method, n_simulations, seed=0):
+    """P(last = k) over an evenly spaced grid of clockwise probabilities, shared across reruns"""
+    probs = np.linspace(p_min, p_max, n_points)
+    return parameter_sweep(probs, 12, [start_position], method=method,
+                           n_simulations=n_simulations, seed=seed)
+
+
+@st.cache_resource
+def get_figure_pool():
+    """Figures reused by every chart on this server"""
+    return FigurePool()
+
+
+@st.cache_resource
+def get_frame_renderer():
+    """Clock frames rendered once and shared by every session on this server"""
+    return CachedClockRenderer()
+
+
+@st.cache_resource
+def get_result_cache():
+    """One result cache shared by every session of this server"""
+    return ResultCache()
+
+
+def streamlit_reporter(label="simulations"):
+    """
+    Progress reporter drawing one st.progress bar, which clears itself when
+    the run completes. Updates arrive throttled (see progress.py), so the
+    bar is redrawn a few times a second rather than once per chunk.
+    """
+    slot = st.empty()
+    
+    def report(done, total):
+        if done >= total:
+            slot.empty()
+        else:
+            slot.progress(done / total, text=f"Completed {done:,} / {total:,} {label}")
+    return throttled(report)
+
+
+def cached_batch_simulate(sim, n_simulations, seed=None, compute=None, progress=None,
+                          source="batch"):
+    """
+    Return sim.batch_simulate(n_simulations) from the shared cache when the
+    same parameters were run before. `compute` can replace the default run,
+    which reports to `progress` if given; give it its own `source` so its
+    results are cached apart from plain batches. Only seeded results are
+    kept on disk.
+    """
+    key = make_key(sim.num_positions, sim.start_position, sim.end_position,
+                   sim.clockwise_prob, n_simulations, seed, source)
+    if compute is None:
+        compute = lambda: sim.batch_simulate(n_simulations, seed=seed, progress=progress)
+    counts = get_result_cache().get_or_compute(
+        key, lambda: counts_from_dict(compute(), sim.num_positions), persist=seed is not None
+    )
+    return counts_to_dict(counts)
+
+
+@st.cache_resource
+def get_lookup_table():
+    """Memory-mapped table of exact distributions (None until `python lookup_table.py --build`)"""
+    return load_lookup_table()
+
+
+def exact_distribution(num_positions, start_position, clockwise_prob):
+    """Exact P(last = k), from the lookup table when it covers the query"""
+    table = get_lookup_table()
+    if table is not None and table.covers(num_positions, clockwise_prob):
+        return table.distribution(num_positions, start_position, clockwise_prob)
+    return last_position_distribution(num_positions, start_position, clockwise_prob)
+
+
+@st.cache_resource
+def get_accumulator_store():
+    """Accumulated Statistics runs per parameter set, shared by every session"""
+    return AccumulatorStore()
+
+
+@st.cache_resource
+def get_export_worker():
+    """Background threads that encode walk animations, so the page never waits on them"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="walk-export")
+
+
+def walk_export_section():
+    """Export the last live walk as GIF/MP4, encoded on the background worker"""
+    record = st.session_state.get('live_walk')
+    if record is None:
+        return
+
+    st.subheader("Export This Walk")
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt != "mp4" or ffmpeg_path() is not None]
+    col1, col2 = st.columns(2)
+    with col1:
+        fmt = st.selectbox("Format", formats, format_func=str.upper, key="export_format",
+                           help="MP4 is offered when ffmpeg is installed")
+    with col2:
+        fps = st.slider("Frames per second", 2, 20, 8, key="export_fps")
+
+    if st.button("EXPORT ANIMATION", key="export_walk", use_container_width=True):
+        st.session_state['export_job'] = {
+            'format': fmt,
+            'future': get_export_worker().submit(export_walk, record, fmt, fps)
+        }
+
+    job = st.session_state.get('export_job')
+    if job is None:
+        return
+    future = job['future']
+    if not future.done():
+        st.info("⏳ Encoding in the background - click Check Export to refresh.")
+        st.button("CHECK EXPORT", key="check_export")
+    elif future.exception() is not None:
+        st.error(f"Export failed: {future.exception()}")
+    else:
+        st.download_button(
+            f"Download {job['format'].upper()}",
+            data=future.result(),
+            file_name=f"ladybug_walk.{job['format']}",
+            mime=MIME_TYPES[job['format']],
+            use_container_width=True
+        )
 
 
 # Main app
@@ -270,7 +398,7 @@ def main():
     st.sidebar.markdown("## Select Mode")
     mode = st.sidebar.radio(
         "Choose what to explore:",
-        ["Live Simulation (Step-by-Step)", "Batch Simulations", "Statistics", "How It Works"],
+        ["Live Simulation (Step-by-Step)", "Batch Simulations", "Statistics", "Parameter Sweep", "How It Works"],
         help="Select a mode to interact with the dashboard"
     )
     
@@ -324,54 +452,74 @@ def main():
         if st.button("START LIVE SIMULATION", key="run_live_anim", use_container_width=True):
             # Run simulation with custom probability and positions
             sim = LadybugSimulator(start_position=start_position, end_position=end_position, clockwise_prob=clockwise_prob)
-            result = sim.simulate()
-            path = result['path']
-            directions = result['directions']
+            path = []
+            directions = []
             
             # Create a placeholder for animation
             clock_placeholder = st.empty()
             info_placeholder = st.empty()
             
-            # Animate step by step with annotations
-            for step_num in range(len(path)):
-                current_pos = path[step_num]
-                visited_so_far = set(path[:step_num+1])
+            # Each distinct clock state is rendered once and then served from the frame cache
+            viz = LadybugClockVisualizer(start_position=start_position)
+            visited_so_far = set()
+            
+            # Animate the walk while it is being simulated, one streamed step at a time
+            for event in sim.iter_steps():
+                frame_start = time.time()
+                current_pos = event.position
+                prev_pos = path[-1] if path else None
+                path.append(current_pos)
+                visited_so_far.add(current_pos)
                 
                 # Get direction label
-                if step_num < len(directions):
-                    direction = directions[step_num]
-                    direction_label = "↻ CW" if direction == 1 else "↺ CCW"
+                if event.direction:
+                    directions.append(event.direction)
+                    direction_label = "↻ CW" if event.direction == 1 else "↺ CCW"
                 else:
                     direction_label = ""
                 
-                prev_pos = path[step_num - 1] if step_num > 0 else None
+                # The walk ends once every position is covered or the end position is reached
+                is_last = (event.covered_count == sim.num_positions
+                           or (event.step > 0 and current_pos == end_position))
                 
-                # Create visualization for current step with annotations
-                viz = LadybugClockVisualizer()
-                fig = viz.create_clock_figure(
+                # Render the current step with annotations (the step number is
+                # shown in the info line so the image depends only on the state)
+                frame = viz.render_clock_png(
                     visited_so_far,
                     current_pos,
-                    result['last_position'] if step_num == len(path) - 1 else None,
-                    f"Step {step_num}: At Position {current_pos}",
+                    current_pos if is_last else None,
+                    f"At Position {current_pos}",
                     prev_position=prev_pos,
                     direction_label=direction_label
                 )
                 
                 # Update visualization
-                clock_placeholder.pyplot(fig)
+                clock_placeholder.image(frame)
                 
                 # Update info with detailed annotation
-                visited_count = len(visited_so_far)
-                if step_num < len(directions):
+                if event.step > 0:
                     move_desc = f"Moved {direction_label} from {prev_pos} to {current_pos}"
                 else:
                     move_desc = f"Started at position {current_pos}"
                 
-                info_text = f"**Step {step_num}** | {move_desc} | Visited: {visited_count}/12 | Positions: {', '.join(map(str, sorted(visited_so_far)))}"
+                info_text = f"**Step {event.step}** | {move_desc} | Visited: {event.covered_count}/12 | Positions: {', '.join(map(str, sorted(visited_so_far)))}"
                 info_placeholder.info(info_text)
                 
-                # Delay for animation
-                time.sleep(0.15)
+                # Delay for animation (rendering time counts towards the frame delay)
+                time.sleep(max(0.0, 0.15 - (time.time() - frame_start)))
+            
+            result = {
+                'last_position': path[-1],
+                'path': path,
+                'visited': visited_so_far,
+                'steps': len(directions),
+                'directions': directions,
+                'reached_end': end_position is not None and path[-1] == end_position and len(path) > 1
+            }
+            # Kept (bit-packed) for the export section below; a new walk drops the old export
+            st.session_state['live_walk'] = CompactPath.from_directions(sim.num_positions, start_position,
+                                                                        directions)
+            st.session_state.pop('export_job', None)
             
             st.divider()
             
@@ -408,53 +556,120 @@ def main():
             
             st.code(path_display, language="text")
         
+        walk_export_section()
+        
         st.divider()
         st.subheader("Compare Multiple Runs with Same Settings")
         
         col1, col2 = st.columns(2)
         with col1:
-            n_compare = st.slider("Number of runs to compare", 5, 50, 10, key="compare_slider")
+            n_compare = st.select_slider(
+                "Number of runs to compare",
+                options=[10, 100, 1000, 10000, 100000, 1000000],
+                value=10000,
+                format_func=lambda n: f"{n:,}",
+                key="compare_slider"
+            )
+        with col2:
+            st.caption("Runs are simulated in one vectorized batch; exact answers are shown alongside.")
         
         if st.button("COMPARE RUNS", use_container_width=True):
             sim = LadybugSimulator(start_position=start_position, end_position=end_position, clockwise_prob=clockwise_prob)
-            last_pos_counts = defaultdict(int)
             
-            progress_bar = st.progress(0)
-            for i in range(n_compare):
-                result = sim.simulate()
-                last_pos_counts[result['last_position']] += 1
-                progress_bar.progress((i + 1) / n_compare)
-            
-            st.subheader(f"Results from {n_compare} Runs (CW: {clockwise_prob:.1%})")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.write("**Distribution of Last Positions:**")
-                for pos in sorted(last_pos_counts.keys()):
-                    count = last_pos_counts[pos]
-                    pct = (count / n_compare) * 100
-                    st.write(f"Position {pos}: {count} ({pct:.0f}%)")
-            
-            with col2:
-                # Chart
-                fig, ax = plt.subplots(figsize=(8, 5))
-                positions = sorted(last_pos_counts.keys())
-                counts = [last_pos_counts[p] for p in positions]
-                colors = ['red' if p == 6 else 'steelblue' for p in positions]
-                ax.bar(positions, counts, color=colors, edgecolor='black', alpha=0.7)
-                ax.set_xlabel('Last Position')
-                ax.set_ylabel('Frequency')
-                ax.set_title(f'Distribution ({n_compare} runs, CW: {clockwise_prob:.1%})')
-                ax.set_xticks(range(1, 13))
-                ax.grid(axis='y', alpha=0.3)
-                st.pyplot(fig)
+            if end_position is None:
+                with st.spinner(f"Running {n_compare:,} walks..."):
+                    last_pos_counts = cached_batch_simulate(sim, n_compare,
+                                                            progress=streamlit_reporter("walks"))
+                exact = exact_distribution(12, start_position, clockwise_prob)
+                
+                st.subheader(f"Results from {n_compare:,} Runs (CW: {clockwise_prob:.1%})")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.write("**Distribution of Last Positions:**")
+                    for pos in sorted(last_pos_counts.keys()):
+                        count = last_pos_counts[pos]
+                        pct = (count / n_compare) * 100
+                        st.write(f"Position {pos}: {count:,} ({pct:.2f}%, exact {exact[pos]*100:.2f}%)")
+                
+                with col2:
+                    # Chart
+                    with get_figure_pool().figure("bar", (8, 5)) as (fig, ax):
+                        positions = sorted(last_pos_counts.keys())
+                        probabilities = [last_pos_counts[p] / n_compare for p in positions]
+                        colors = ['red' if p == 6 else 'steelblue' for p in positions]
+                        ax.bar(positions, probabilities, color=colors, edgecolor='black', alpha=0.7,
+                               label='Simulated')
+                        ax.plot(range(1, 13), exact[1:], color='green', linestyle='--', marker='o',
+                                label='Exact')
+                        ax.set_xlabel('Last Position')
+                        ax.set_ylabel('Probability')
+                        ax.set_title(f'Distribution ({n_compare:,} runs, CW: {clockwise_prob:.1%})')
+                        ax.set_xticks(range(1, 13))
+                        ax.legend()
+                        ax.grid(axis='y', alpha=0.3)
+                        st.pyplot(fig)
+            else:
+                with st.spinner(f"Running {n_compare:,} walks..."):
+                    hit = cached_hitting_statistics(start_position, end_position, clockwise_prob, n_compare)
+                # A return to the start has no gambler's-ruin closed form, so it is simulated only
+                exact_hit = (exact_hitting_statistics(12, start_position, end_position, clockwise_prob)
+                             if end_position != start_position else None)
+                
+                st.subheader(f"Reaching Position {end_position}: {n_compare:,} Runs (CW: {clockwise_prob:.1%})")
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Mean Steps (Simulated)", f"{hit['mean_steps']:.2f}")
+                with col2:
+                    st.metric("Mean Steps (Exact)",
+                              f"{exact_hit['mean_steps']:.2f}" if exact_hit else "-")
+                with col3:
+                    st.metric("P(All Colored First)", f"{hit['cover_first_prob']:.4f}")
+                with col4:
+                    st.metric("Exact P(All Colored First)",
+                              f"{exact_hit['cover_first_prob']:.4f}" if exact_hit else "-")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    with get_figure_pool().figure("bar", (8, 5)) as (fig, ax):
+                        colored_probs = hit['colored_counts'] / hit['runs']
+                        ax.bar(range(1, 13), colored_probs[1:], color='steelblue', edgecolor='black',
+                               alpha=0.7, label='Simulated')
+                        if exact_hit:
+                            ax.plot(range(1, 13), exact_hit['colored_probs'][1:], color='green',
+                                    linestyle='--', marker='o', label='Exact')
+                        ax.set_xlabel('Positions Colored When Stopped')
+                        ax.set_ylabel('Probability')
+                        ax.set_title('Positions Colored Before Reaching the End')
+                        ax.set_xticks(range(1, 13))
+                        ax.legend()
+                        ax.grid(axis='y', alpha=0.3)
+                        st.pyplot(fig)
+                with col2:
+                    with get_figure_pool().figure("bar", (8, 5)) as (fig, ax):
+                        step_counts = hit['step_counts']
+                        # Cut the long right tail at the 99.9th percentile
+                        cutoff = int(np.searchsorted(np.cumsum(step_counts), 0.999 * hit['runs'])) + 1
+                        ax.bar(np.arange(cutoff), step_counts[:cutoff] / hit['runs'], width=1.0,
+                               color='steelblue', alpha=0.7, label='Simulated')
+                        if exact_hit:
+                            exact_steps = exact_hit['step_probs'][:cutoff]
+                            ax.plot(np.arange(len(exact_steps)), exact_steps, color='green',
+                                    linewidth=1.5, label='Exact')
+                        ax.set_xlabel('Steps to Stop')
+                        ax.set_ylabel('Probability')
+                        ax.set_title('Hitting-Time Distribution')
+                        ax.legend()
+                        ax.grid(axis='y', alpha=0.3)
+                        st.pyplot(fig)
     
     # MODE 2: BATCH SIMULATIONS
     elif mode == "Batch Simulations":
         st.header("Run Multiple Simulations")
         
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             n_sims = st.slider("Number of simulations", 10, 5000, 100, step=10)
         with col2:
@@ -462,12 +677,27 @@ def main():
             ccw_prob = 1.0 - cw_prob
         with col3:
             st.metric("Counter-clockwise", f"{ccw_prob:.0%}")
+        with col4:
+            n_walkers = st.slider("Number of ladybugs", 1, 8, 1, key="batch_walkers",
+                                  help="Several ladybugs walk at once and share the colors")
         
         if st.button("RUN BATCH SIMULATIONS", use_container_width=True):
             sim = LadybugSimulator(clockwise_prob=cw_prob)
             
             with st.spinner("Running simulations..."):
-                results = sim.batch_simulate(n_sims)
+                if n_walkers == 1:
+                    results = cached_batch_simulate(sim, n_sims, progress=streamlit_reporter())
+                else:
+                    multi = cached_multi_walker_statistics(n_walkers, cw_prob, 0.0, n_sims)
+                    results = counts_to_dict(multi['last_counts'])
+            
+            if n_walkers > 1:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Mean Steps to Color All", f"{multi['mean_steps']:.2f}")
+                with col2:
+                    st.metric("Tied Finishes", f"{multi['tied_finishes']:,}",
+                              help="Runs whose final step colored two positions at once; one was picked at random")
             
             st.subheader("Distribution Results")
             
@@ -484,43 +714,139 @@ def main():
             with col2:
                 st.write("**Visual Distribution:**")
                 # Bar chart
-                fig, ax = plt.subplots(figsize=(10, 5))
-                positions = sorted(results.keys())
-                counts = [results[p] for p in positions]
-                colors = ['red' if p == 6 else 'steelblue' for p in positions]
-                
-                ax.bar(positions, counts, color=colors, edgecolor='black', alpha=0.7)
-                ax.set_xlabel('Last Position', fontsize=12)
-                ax.set_ylabel('Frequency', fontsize=12)
-                ax.set_title(f'Distribution After {n_sims} Simulations', fontsize=14, fontweight='bold')
-                ax.set_xticks(range(1, 13))
-                ax.grid(axis='y', alpha=0.3)
-                
-                st.pyplot(fig)
+                with get_figure_pool().figure("bar", (10, 5)) as (fig, ax):
+                    positions = sorted(results.keys())
+                    counts = [results[p] for p in positions]
+                    colors = ['red' if p == 6 else 'steelblue' for p in positions]
+                    
+                    ax.bar(positions, counts, color=colors, edgecolor='black', alpha=0.7)
+                    ax.set_xlabel('Last Position', fontsize=12)
+                    ax.set_ylabel('Frequency', fontsize=12)
+                    ladybugs = "" if n_walkers == 1 else f", {n_walkers} Ladybugs"
+                    ax.set_title(f'Distribution After {n_sims} Simulations{ladybugs}', fontsize=14, fontweight='bold')
+                    ax.set_xticks(range(1, 13))
+                    ax.grid(axis='y', alpha=0.3)
+                    
+                    st.pyplot(fig)
     
     # MODE 3: STATISTICS
     elif mode == "Statistics":
         st.header("Statistical Analysis")
         
         st.write("""
-        This mode runs simulations to determine the probability 
-        that each position is the last one visited.
+        This mode computes the exact probability that each position is the last one
+        visited, and runs simulations to check it.
         """)
         
+        run_mode = st.radio(
+            "Run count",
+            ["Fixed number of runs", "Target precision"],
+            horizontal=True,
+            help="Target precision keeps running until every probability's 95% interval is narrower than the tolerance",
+            key="stats_run_mode"
+        )
+        
         col1, col2, col3 = st.columns(3)
         with col1:
-            n_stats = st.slider("Number of simulations", 1000, 50000, 10000, step=1000, key="stats_n")
+            if run_mode == "Target precision":
+                tolerance = st.select_slider(
+                    "Widest 95% interval",
+                    options=[0.02, 0.01, 0.005, 0.002, 0.001, 0.0005],
+                    value=0.005,
+                    key="stats_tol"
+                )
+            else:
+                n_stats = st.select_slider(
+                    "Number of simulations",
+                    options=[1000, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000, 10000000],
+                    value=10000,
+                    format_func=lambda n: f"{n:,}",
+                    key="stats_n"
+                )
+                estimator = st.selectbox(
+                    "Estimator",
+                    [None, "antithetic", "conditional"],
+                    format_func=lambda e: {None: "Plain counts", "antithetic": "Antithetic mirror pairs",
+                                           "conditional": "Conditional (exact for the last positions)"}[e],
+                    help="Variance-reduced estimators report how many plain runs they are worth",
+                    key="stats_estimator"
+                )
+                remaining = None
+                if estimator == "conditional":
+                    remaining = st.slider(
+                        "Positions left when the exact answer takes over", 1, 11,
+                        default_remaining(12),
+                        help="Handing over earlier removes more variance and simulates fewer steps",
+                        key="stats_remaining"
+                    )
         with col2:
             cw_prob_stats = st.slider("Clockwise probability", 0.0, 1.0, 0.5, step=0.05, key="stats_cw")
             ccw_prob_stats = 1.0 - cw_prob_stats
         with col3:
             st.metric("Counter-clockwise", f"{ccw_prob_stats:.0%}")
         
+        if estimator == "antithetic" and cw_prob_stats == 0.5:
+            # Mirror pairs of a fair walk are no better than two plain walks
+            st.info("Antithetic pairs give no variance reduction on the fair clock, "
+                    "so plain counts are used instead.")
+            estimator = None
+        
+        # Exact answer for the chosen bias (instant, no simulation needed)
+        exact = exact_distribution(12, 12, cw_prob_stats)
+        
+        st.subheader("Exact Answer")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Exact Prob Position 6 Last", f"{exact[6]:.6f}")
+        with col2:
+            st.metric("As Percentage", f"{exact[6]*100:.2f}%")
+        
+        st.divider()
+        
         if st.button("RUN SIMULATIONS", use_container_width=True):
-            sim = LadybugSimulator(clockwise_prob=cw_prob_stats)
-            
-            with st.spinner(f"Running {n_stats:,} simulations... this takes a moment"):
-                results = sim.batch_simulate(n_stats)
+            precision = None
+            estimate = None
+            if run_mode == "Target precision":
+                with st.spinner(f"Running until every interval is narrower than {tolerance}..."):
+                    precision = run_until_precision(12, 12, cw_prob_stats, tolerance=tolerance)
+                results = counts_to_dict(precision['counts'])
+                n_stats = precision['runs']
+                if precision['converged']:
+                    st.success(f"Reached the tolerance after {n_stats:,} runs "
+                               f"(widest interval {precision['max_width']:.5f})")
+                else:
+                    st.warning(f"Stopped at {n_stats:,} runs before reaching the tolerance "
+                               f"(widest interval {precision['max_width']:.5f})")
+            elif estimator is not None:
+                with st.spinner(f"Running {n_stats:,} simulations..."):
+                    estimate = cached_variance_reduced(cw_prob_stats, n_stats, estimator, remaining,
+                                                       _progress=streamlit_reporter())
+                # Estimated counts (probability x runs), fractional in general
+                results = {pos: float(estimate['counts'][pos]) for pos in range(1, 13)}
+                n_stats = estimate['runs']
+                if np.isnan(estimate['overall_gain']):
+                    st.info("Every walk ends the same way at this bias, so there is no variance to reduce.")
+                elif np.isinf(estimate['overall_gain']):
+                    st.success("Exact: every walk contributes the same answer, so no sampling noise is left")
+                elif estimate['overall_gain'] < 1 or estimate['ess_gain'][6] < 1:
+                    st.warning(f"No variance reduction here: {estimate['overall_gain']:.2f}x overall and "
+                               f"{estimate['ess_gain'][6]:.2f}x for position 6, so plain counts "
+                               f"do as well (or better)")
+                else:
+                    st.success(f"Worth {estimate['ess']:,.0f} plain runs "
+                               f"({estimate['overall_gain']:.2f}x effective-sample-size gain)")
+            else:
+                sim = LadybugSimulator(clockwise_prob=cw_prob_stats)
+                
+                # Only the runs beyond what was already accumulated get simulated
+                accumulator = get_accumulator_store().get(12, 12, cw_prob_stats)
+                with st.spinner(f"Running {max(n_stats - accumulator.runs, 0):,} new simulations..."):
+                    reporter = streamlit_reporter("new simulations")
+                    results = cached_batch_simulate(
+                        sim, n_stats,
+                        compute=lambda: accumulator.counts_dict(n_stats, progress=reporter),
+                        source="accumulator"
+                    )
             
             st.subheader("Results")
             
@@ -533,7 +859,7 @@ def main():
             with col2:
                 st.metric("As Percentage", f"{prob_6*100:.2f}%")
             with col3:
-                st.metric("Expected (Theory)", "9.09% (1/11)")
+                st.metric("Expected (Theory)", f"{exact[6]*100:.2f}%")
             
             st.divider()
             
@@ -543,38 +869,302 @@ def main():
             dist_data = []
             for pos in sorted(results.keys()):
                 prob = results[pos] / n_stats
-                dist_data.append({
+                row = {
                     'Position': pos,
-                    'Count': results[pos],
+                    'Count': results[pos] if estimate is None else f"{results[pos]:,.1f}",
                     'Probability': f"{prob:.6f}",
-                    'Percentage': f"{prob*100:.2f}%"
-                })
+                    'Percentage': f"{prob*100:.2f}%",
+                    'Exact': f"{exact[pos]:.6f}"
+                }
+                if precision is not None:
+                    row['95% CI'] = f"[{precision['lower'][pos]:.6f}, {precision['upper'][pos]:.6f}]"
+                if estimate is not None:
+                    row['Std Error'] = f"{estimate['std_error'][pos]:.6f}"
+                    gain = estimate['ess_gain'][pos]
+                    row['ESS Gain'] = ("-" if np.isnan(gain) else "exact" if np.isinf(gain)
+                                       else f"{gain:.2f}x")
+                dist_data.append(row)
             
             st.table(dist_data)
             
             # Visualization
             st.subheader("Probability Distribution Chart")
             
-            fig, ax = plt.subplots(figsize=(12, 6))
-            positions = sorted(results.keys())
-            probabilities = [results[p]/n_stats for p in positions]
+            with get_figure_pool().figure("bar", (12, 6)) as (fig, ax):
+                positions = sorted(results.keys())
+                probabilities = [results[p]/n_stats for p in positions]
+                
+                colors = ['red' if p == 6 else 'steelblue' for p in positions]
+                ax.bar(positions, probabilities, color=colors, edgecolor='black', alpha=0.7, label='Simulated')
+                
+                # Exact theory for this bias
+                ax.plot(range(1, 13), exact[1:], color='green', linestyle='--', marker='o',
+                        linewidth=2, label='Theoretical (exact)')
+                
+                ax.set_xlabel('Position', fontsize=12)
+                ax.set_ylabel('Probability', fontsize=12)
+                ax.set_title(f'Probability Distribution ({n_stats:,} Simulations)', fontsize=14, fontweight='bold')
+                ax.set_xticks(range(1, 13))
+                ax.legend(fontsize=11)
+                ax.grid(axis='y', alpha=0.3)
+                
+                st.pyplot(fig)
+        
+        st.divider()
+        st.subheader("Rare Events")
+        st.write("""
+        With a strong bias most positions are almost never last, and plain runs
+        show zeros. Rare-event mode draws tilted walks for each position and
+        reweights them, so even probabilities like 1e-16 come out to a chosen
+        relative error.
+        """)
+        
+        rel_tol = st.select_slider(
+            "Relative error",
+            options=[0.2, 0.1, 0.05, 0.02, 0.01],
+            value=0.05,
+            format_func=lambda r: f"{r:.0%}",
+            key="rare_tol"
+        )
+        if st.button("ESTIMATE RARE EVENTS", use_container_width=True):
+            with st.spinner("Running tilted walks..."):
+                rare = cached_rare_event_estimate(cw_prob_stats, rel_tol)
             
-            colors = ['red' if p == 6 else 'steelblue' for p in positions]
-            ax.bar(positions, probabilities, color=colors, edgecolor='black', alpha=0.7, label='Simulated')
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Walks Used", f"{rare['runs']:,}")
+            with col2:
+                st.metric("Plain Runs Needed", f"{rare['speedup'] * rare['runs']:.3g}",
+                          help="Plain runs that would pin down the rarest position as well")
+            if not rare['converged']:
+                st.warning("Stopped at the walk limit before every position reached the relative error")
             
-            # Theoretical line
-            ax.axhline(y=1/11, color='green', linestyle='--', linewidth=2, label='Theoretical (50-50)')
+            # Straight from the solver: the lookup table interpolates in p, which tiny values don't survive
+            rare_exact = last_position_distribution(12, 12, cw_prob_stats)
+            st.table([
+                {
+                    'Position': pos,
+                    'Estimate': f"{rare['probs'][pos]:.4e}",
+                    'Relative Error': ("-" if np.isnan(rare['rel_error'][pos])
+                                       else f"{rare['rel_error'][pos]:.1%}"),
+                    'Walks': f"{rare['walks'][pos]:,}",
+                    # Below the float range the solver gives 0; show nothing rather than a wrong 0
+                    'Exact': ("-" if rare_exact[pos] == 0 and rare['probs'][pos] > 0
+                              else f"{rare_exact[pos]:.4e}")
+                }
+                for pos in range(1, 13)
+            ])
             
-            ax.set_xlabel('Position', fontsize=12)
-            ax.set_ylabel('Probability', fontsize=12)
-            ax.set_title(f'Probability Distribution ({n_stats:,} Simulations)', fontsize=14, fontweight='bold')
-            ax.set_xticks(range(1, 13))
+            with get_figure_pool().figure("bar", (12, 5)) as (fig, ax):
+                shown = [pos for pos in range(1, 13) if rare['probs'][pos] > 0]
+                ax.bar(shown, [rare['probs'][pos] for pos in shown], color='steelblue',
+                       edgecolor='black', alpha=0.7, label='Rare-event estimate')
+                ax.set_yscale('log')
+                ax.set_xlabel('Position', fontsize=12)
+                ax.set_ylabel('Probability (log scale)', fontsize=12)
+                ax.set_title('P(last = k), Rare Events Included', fontsize=14, fontweight='bold')
+                ax.set_xticks(range(1, 13))
+                ax.legend(fontsize=11)
+                ax.grid(axis='y', alpha=0.3)
+                st.pyplot(fig)
+        
+        st.divider()
+        st.subheader("Cover Time")
+        st.write("How many steps it takes to color every position.")
+        
+        cover_exact = cover_time_moments(12, cw_prob_stats)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Expected Steps (Exact)", f"{cover_exact['mean']:.2f}")
+        with col2:
+            st.metric("Standard Deviation (Exact)", f"{cover_exact['std']:.2f}")
+        
+        # Exact coverage after every step, evolved over the coloring states (no sampling)
+        timeline = coverage_over_time(12, 12, cw_prob_stats, horizon=5000, tolerance=1e-4)
+        steps_axis = np.arange(timeline['steps'] + 1)
+        expected_colored = timeline['coverage'] @ np.arange(13)
+        with get_figure_pool().figure("line", (12, 5)) as (fig, ax):
+            ax.plot(steps_axis, expected_colored / 12, color='steelblue', linewidth=2,
+                    label='Expected fraction colored')
+            ax.plot(steps_axis, timeline['coverage'][:, 12], color='red', linewidth=2,
+                    label='P(every position colored)')
+            ax.axvline(cover_exact['mean'], color='green', linestyle='--', linewidth=1.5,
+                       label=f"Expected cover time ({cover_exact['mean']:.1f})")
+            ax.set_xlabel('Step', fontsize=12)
+            ax.set_ylabel('Probability / fraction', fontsize=12)
+            ax.set_title('Coloring Over Time (Exact)', fontsize=14, fontweight='bold')
+            ax.set_ylim(0, 1.02)
             ax.legend(fontsize=11)
-            ax.grid(axis='y', alpha=0.3)
-            
+            ax.grid(alpha=0.3)
             st.pyplot(fig)
+        
+        n_cover = st.select_slider(
+            "Walks for the cover-time histogram",
+            options=[10000, 100000, 1000000],
+            value=100000,
+            format_func=lambda n: f"{n:,}",
+            key="cover_n"
+        )
+        if st.button("SIMULATE COVER TIMES", use_container_width=True):
+            with st.spinner(f"Running {n_cover:,} walks..."):
+                cover = cached_cover_statistics(cw_prob_stats, n_cover)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Simulated Mean Steps", f"{cover['mean_steps']:.2f}")
+            with col2:
+                st.metric("Simulated Std", f"{cover['std_steps']:.2f}")
+            
+            with get_figure_pool().figure("bar", (12, 5)) as (fig, ax):
+                step_counts = cover['step_counts']
+                # Cut the long right tail at the 99.9th percentile
+                cutoff = int(np.searchsorted(np.cumsum(step_counts), 0.999 * cover['runs'])) + 1
+                ax.bar(np.arange(cutoff), step_counts[:cutoff] / cover['runs'], width=1.0,
+                       color='steelblue', alpha=0.8)
+                ax.axvline(cover_exact['mean'], color='green', linestyle='--', linewidth=2,
+                           label=f"Exact mean ({cover_exact['mean']:.1f})")
+                ax.set_xlabel('Steps to color every position', fontsize=12)
+                ax.set_ylabel('Probability', fontsize=12)
+                ax.set_title(f'Cover Time Distribution ({cover["runs"]:,} Walks)', fontsize=14, fontweight='bold')
+                ax.legend(fontsize=11)
+                ax.grid(axis='y', alpha=0.3)
+                st.pyplot(fig)
+            
+            # Positions that are never last (the start, or any under a fully biased walk) show a dash
+            st.table([
+                {
+                    'Position': pos,
+                    'Mean Steps When Last': ("-" if np.isnan(cover['mean_steps_by_last'][pos])
+                                             else f"{cover['mean_steps_by_last'][pos]:.2f}"),
+                    'Mean First Visit Step': f"{cover['first_visit_mean'][pos]:.2f}"
+                }
+                for pos in range(1, 13)
+            ])
+        
+        st.divider()
+        st.subheader("Several Ladybugs")
+        st.write("""
+        K ladybugs start together at 12 and share the colors: a position is colored
+        when any of them lands on it. Step correlation is the chance that all of
+        them follow the same coin on a step.
+        """)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_walkers_stats = st.slider("Number of ladybugs", 2, 8, 2, key="stats_walkers")
+        with col2:
+            correlation = st.slider("Step correlation", 0.0, 1.0, 0.0, step=0.1, key="stats_corr")
+        with col3:
+            n_multi = st.select_slider(
+                "Runs per ladybug count",
+                options=[1000, 10000, 100000],
+                value=10000,
+                format_func=lambda n: f"{n:,}",
+                key="stats_multi_n"
+            )
+        
+        if st.button("SIMULATE SEVERAL LADYBUGS", use_container_width=True):
+            with st.spinner(f"Running {n_multi:,} runs for 1 to {n_walkers_stats} ladybugs..."):
+                scaling = cached_walker_count_sweep(n_walkers_stats, cw_prob_stats, correlation, n_multi)
+            
+            walker_counts = scaling['walker_counts']
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric(f"Prob Position 6 Last ({n_walkers_stats} Ladybugs)",
+                          f"{scaling['last_probs'][-1, 6]:.4f}")
+            with col2:
+                st.metric(f"Mean Steps to Color All ({n_walkers_stats} Ladybugs)",
+                          f"{scaling['mean_steps'][-1]:.2f}")
+            
+            with get_figure_pool().figure("line", (12, 5)) as (fig, ax):
+                ax.plot(walker_counts, scaling['mean_steps'], color='steelblue', marker='o',
+                        linewidth=2)
+                ax.set_xlabel('Number of ladybugs', fontsize=12)
+                ax.set_ylabel('Mean steps to color all', fontsize=12)
+                ax.set_title('Cover Time as Ladybugs Are Added', fontsize=14, fontweight='bold')
+                ax.set_xticks(walker_counts)
+                ax.grid(alpha=0.3)
+                st.pyplot(fig)
+            
+            with get_figure_pool().figure("bar", (12, 5)) as (fig, ax):
+                width = 0.8 / len(walker_counts)
+                for i, k in enumerate(walker_counts):
+                    ax.bar(np.arange(1, 13) + (i - (len(walker_counts) - 1) / 2) * width,
+                           scaling['last_probs'][i, 1:], width=width, label=f"K = {k}")
+                ax.set_xlabel('Last Position', fontsize=12)
+                ax.set_ylabel('Probability', fontsize=12)
+                ax.set_title('Which Position Is Last, by Number of Ladybugs', fontsize=14, fontweight='bold')
+                ax.set_xticks(range(1, 13))
+                ax.legend(fontsize=10)
+                ax.grid(axis='y', alpha=0.3)
+                st.pyplot(fig)
+    
+    # MODE 4: PARAMETER SWEEP
+    elif mode == "Parameter Sweep":
+        st.header("Parameter Sweep")
+        
+        st.write("""
+        See how the bias changes the answer: P(last = k) for a whole grid of clockwise
+        probabilities at once, computed exactly or simulated in a single vectorized batch.
+        """)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            p_min, p_max = st.slider("Clockwise probability range", 0.0, 1.0, (0.0, 1.0),
+                                     step=0.01, key="sweep_range")
+            n_points = st.select_slider("Grid points", options=[11, 21, 51, 101, 201], value=101,
+                                        key="sweep_points")
+        with col2:
+            sweep_start = st.selectbox("Starting Position", options=list(range(1, 13)), index=11,
+                                       key="sweep_start")
+        with col3:
+            sweep_method = st.radio("Method", ["exact", "simulate"], format_func=str.title,
+                                    key="sweep_method")
+            sweep_runs = st.select_slider("Runs per grid point", options=[1000, 10000, 100000],
+                                          value=10000, format_func=lambda n: f"{n:,}",
+                                          key="sweep_runs", disabled=sweep_method == "exact")
+        
+        if st.button("RUN SWEEP", use_container_width=True):
+            with st.spinner("Sweeping..."):
+                sweep = cached_parameter_sweep(p_min, p_max, n_points, sweep_start, sweep_method,
+                                               sweep_runs)
+            probs = sweep['clockwise_probs']
+            surface = sweep['surface'][0, 0]  # [p, k]
+            
+            st.subheader("P(last = k) Across the Sweep")
+            with get_figure_pool().figure("heatmap", (12, 6)) as (fig, ax):
+                image = ax.imshow(surface[:, 1:].T, aspect='auto', origin='lower', cmap='viridis',
+                                  extent=[probs[0], probs[-1], 0.5, 12.5])
+                fig.colorbar(image, ax=ax, label='Probability')
+                ax.set_xlabel('Clockwise probability', fontsize=12)
+                ax.set_ylabel('Last position', fontsize=12)
+                ax.set_yticks(range(1, 13))
+                ax.set_title(f'P(last = k), start {sweep_start} ({sweep_method})', fontsize=14,
+                             fontweight='bold')
+                st.pyplot(fig)
+            
+            with get_figure_pool().figure("line", (12, 5)) as (fig, ax):
+                opposite = (sweep_start + 5) % 12 + 1
+                ax.plot(probs, surface[:, opposite], color='red', linewidth=2,
+                        label=f'Position {opposite} (opposite the start)')
+                ax.plot(probs, surface[:, 1:].max(axis=1), color='steelblue', linestyle='--',
+                        linewidth=1.5, label='Most likely last position')
+                ax.set_xlabel('Clockwise probability', fontsize=12)
+                ax.set_ylabel('Probability', fontsize=12)
+                ax.set_title('Selected Slices', fontsize=14, fontweight='bold')
+                ax.legend(fontsize=11)
+                ax.grid(alpha=0.3)
+                st.pyplot(fig)
+            
+            st.download_button(
+                "Download sweep (.npz)",
+                data=sweep_to_npz_bytes(sweep),
+                file_name=f"ladybug_sweep_start{sweep_start}_{sweep_method}.npz",
+                mime="application/octet-stream",
+                use_container_width=True
+            )
     
-    # MODE 4: HOW IT WORKS
+    # MODE 5: HOW IT WORKS
     elif mode == "How It Works":
         st.header("Understanding the Problem")
         
@@ -605,8 +1195,7 @@ def main():
             
             with col2:
                 viz = LadybugClockVisualizer()
-                fig = viz.create_clock_figure({12}, 12, None, "Initial State")
-                st.pyplot(fig)
+                st.image(viz.render_clock_png({12}, 12, None, "Initial State"))
         
         with tab2:
             st.subheader("The Algorithm")
@@ -681,6 +1270,25 @@ def main():
                 This confirms our theoretical analysis!
                 """)
 
+    
+    # Figure pool instrumentation (shared by every session on this server)
+    with st.sidebar.expander("Server diagnostics"):
+        pool_stats = get_figure_pool().stats()
+        st.caption(
+            f"Figures in use: {pool_stats['in_use']} | idle: {pool_stats['idle']} | "
+            f"~{pool_stats['estimated_mb']:.0f} / {pool_stats['cap_mb']:.0f} MB"
+        )
+        st.caption(
+            f"Created: {pool_stats['created']} | reused: {pool_stats['reused']} | "
+            f"evicted: {pool_stats['evicted'] + pool_stats['discarded']} | "
+            f"waited at cap: {pool_stats['waited']}"
+        )
+        frame_stats = get_frame_renderer().cache.stats()
+        st.caption(
+            f"Clock frames cached: {frame_stats['frames']} (~{frame_stats['mb']:.1f} MB) | "
+            f"hits: {frame_stats['hits']} | misses: {frame_stats['misses']}"
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Parameter sweeps: P(last = k) over a grid of clockwise probabilities, and
+optionally several clock sizes and start positions, in one call.
+
+Two kinds of sharing keep a sweep cheap:
+
+- Only start position N is ever computed. Turning the clock maps any other
+  start onto it, so every other start is a rotation of the same row.
+- The simulated sweep runs the walks for every p in the grid as one
+  vectorized block, each walk carrying its own clockwise probability, so a
+  100-point sweep is a single batch run rather than 100 of them.
+
+The exact sweep uses exact_solver and needs no sampling at all.
+"""
+
+import io
+
+import numpy as np
+
+from batch_engine import DEFAULT_CHUNK_SIZE
+from exact_solver import last_position_distribution
+
+METHODS = ("exact", "simulate")
+
+
+def _swept_last_offsets(num_positions, walk_probs, rng):
+    """
+    Run one walk per entry of walk_probs (each with its own clockwise
+    probability) to full coverage.
+
+    Returns:
+        Offset from the start of every walk's last colored position, in the
+        order of walk_probs
+    """
+    span = num_positions - 1
+    dtype = np.int16 if num_positions < 1 << 14 else np.int32
+    last = np.zeros(len(walk_probs), dtype=np.int64)
+    if span == 0:
+        return last
+
+    index = np.arange(len(walk_probs))
+    offset = np.zeros(len(walk_probs), dtype=dtype)
+    reach_cw = np.zeros_like(offset)
+    reach_ccw = np.zeros_like(offset)
+    while offset.size:
+        clockwise = rng.random(offset.size) < walk_probs
+        offset += clockwise.view(np.int8) * 2 - 1
+        np.maximum(reach_cw, offset, out=reach_cw)
+        np.minimum(reach_ccw, offset, out=reach_ccw)
+
+        done = (reach_cw - reach_ccw) == span
+        if done.any():
+            last[index[done]] = offset[done]
+            keep = ~done
+            index = index[keep]
+            walk_probs = walk_probs[keep]
+            offset = offset[keep]
+            reach_cw = reach_cw[keep]
+            reach_ccw = reach_ccw[keep]
+    return last
+
+
+def _simulated_rows(num_positions, clockwise_probs, n_simulations, rng, chunk_size):
+    """P(last = start + m) for every p in the grid, estimated from n_simulations walks per p"""
+    n = num_positions
+    counts = np.zeros((len(clockwise_probs), n), dtype=np.int64)
+    walks_per_block = max(1, chunk_size // len(clockwise_probs))
+    remaining = n_simulations
+    while remaining > 0:
+        n_block = min(walks_per_block, remaining)
+        p_index = np.repeat(np.arange(len(clockwise_probs)), n_block)
+        offsets = _swept_last_offsets(n, clockwise_probs[p_index], rng)
+        counts += np.bincount(p_index * n + offsets % n,
+                              minlength=len(clockwise_probs) * n).reshape(-1, n)
+        remaining -= n_block
+    return counts / n_simulations
+
+
+def parameter_sweep(clockwise_probs, num_positions=12, start_positions=None, method="exact",
+                    n_simulations=10000, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    P(last = k) over a grid of clockwise probabilities, clock sizes and start positions.
+
+    Args:
+        clockwise_probs: Sequence of clockwise probabilities
+        num_positions: Clock size, or a sequence of clock sizes
+        start_positions: Sequence of start positions (None for start N on
+            every clock); each must exist on every clock in the sweep
+        method: "exact" (exact solver) or "simulate" (vectorized simulation)
+        n_simulations: Walks per (clock size, p) when simulating
+        seed: Seed for the simulation's random stream
+        chunk_size: Number of walks advanced together in one block
+
+    Returns:
+        Dictionary with
+            'clockwise_probs', 'sizes', 'starts': the grid axes (starts is
+                None when every clock started at N)
+            'surface': array indexed [size, start, p, k] with P(last = k);
+                k runs 0..max(sizes), entry 0 and entries past N are zero
+            'method': the method used
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown sweep method {method!r}, expected one of {METHODS}")
+
+    probs = np.asarray(clockwise_probs, dtype=np.float64)
+    sizes = np.atleast_1d(np.asarray(num_positions, dtype=np.int64))
+    max_n = int(sizes.max())
+    n_starts = 1 if start_positions is None else len(start_positions)
+    if start_positions is not None and max(start_positions) > sizes.min():
+        raise ValueError("Every start position must exist on every clock in the sweep")
+    rng = np.random.default_rng(seed)
+
+    surface = np.zeros((len(sizes), n_starts, len(probs), max_n + 1))
+    for i, n in enumerate(sizes):
+        n = int(n)
+        # by_offset[j, m] = P(last is m steps clockwise of the start | p = probs[j])
+        if method == "exact":
+            by_offset = np.array([np.roll(last_position_distribution(n, n, float(p))[1:], 1)
+                                  for p in probs])
+        else:
+            by_offset = _simulated_rows(n, probs, n_simulations, rng, chunk_size)
+
+        starts = [n] if start_positions is None else start_positions
+        for s, start in enumerate(starts):
+            # Offset m from the start is position start + m
+            surface[i, s, :, 1:n + 1] = np.roll(by_offset, start - 1, axis=1)
+
+    return {
+        'clockwise_probs': probs,
+        'sizes': sizes,
+        'starts': None if start_positions is None else np.asarray(start_positions),
+        'surface': surface,
+        'method': method
+    }
+
+
+def sweep_to_npz_bytes(sweep):
+    """Serialize a parameter_sweep result as .npz file contents (for downloads)"""
+    buffer = io.BytesIO()
+    arrays = {key: value for key, value in sweep.items() if value is not None}
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
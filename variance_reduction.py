@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Variance-reduced estimates of P(last = k).
+
+Two estimators, both vectorized like batch_engine and both reporting their
+effective-sample-size (ESS) gain: how many plain walks one walk of the
+estimator is worth.
+
+- "antithetic": walks come in pairs driven by the same random numbers, the
+  second taking a clockwise step exactly when the first's number u has
+  1 - u < p. At p = 0.5 the partner is the first walk mirrored around the
+  start. Each pair contributes the average of its two indicators. This is
+  not a variance reduction for the symmetric walk: the positions are
+  already symmetric, so the overall gain is about 1.0x there, and the
+  position opposite the start does worse (about 0.5x), since a pair always
+  agrees on it. It gains a little (about 1.1-1.2x) on biased walks.
+- "conditional": a walk is only simulated until `remaining` positions are
+  left uncolored, and the exact probability of each of them being last is
+  added in place of the 0/1 outcome. With two left the walker stands at one
+  end of the colored arc and the answer is a single gambler's-ruin race
+  between the two gap ends; for a wider gap it takes two races per
+  position. Handing over earlier removes more variance (and steps): on the
+  12-position fair clock the gain is about 1.2x with two positions left,
+  3.7x with six and 55x with ten. The default hands over with three
+  quarters of the clock left (see default_remaining).
+
+The gain for position k is p_k(1 - p_k) divided by the variance of one
+walk's contribution to the estimate. The overall gain is the same ratio
+summed over all positions.
+"""
+
+import numpy as np
+
+from batch_engine import DEFAULT_CHUNK_SIZE, step_directions
+from progress import throttled
+from walk_kernel import exit_ccw_probability, exit_cw_probability
+
+ESTIMATORS = ("antithetic", "conditional")
+
+
+def default_remaining(num_positions):
+    """Positions left uncolored when "conditional" hands over: three quarters of the clock"""
+    return max(1, 3 * (num_positions - 1) // 4)
+
+
+def _antithetic_chunk(num_positions, clockwise_prob, n_pairs, rng):
+    """
+    Run n_pairs antithetic pairs of walks to full coverage.
+
+    Returns:
+        (2, n_pairs) array of last offsets from the start, row 0 for the first
+        walk of each pair and row 1 for its partner
+    """
+    span = num_positions - 1
+    dtype = np.int16 if num_positions < 1 << 14 else np.int32
+    last = np.zeros((2, n_pairs), dtype=np.int64)
+    if span == 0:
+        return last
+
+    index = np.arange(n_pairs)
+    offset = np.zeros((2, n_pairs), dtype=dtype)
+    reach_cw = np.zeros_like(offset)
+    reach_ccw = np.zeros_like(offset)
+    walking = np.ones((2, n_pairs), dtype=bool)
+    while index.size:
+        if clockwise_prob == 0.5:
+            first = step_directions(rng, index.size, clockwise_prob)
+            steps = np.stack([first, -first])
+        else:
+            u = rng.random(index.size)
+            steps = np.where(np.stack([u < clockwise_prob, 1.0 - u < clockwise_prob]), 1, -1)
+        # A walk that finished waits for its partner without moving
+        offset += (steps * walking).astype(dtype)
+        np.maximum(reach_cw, offset, out=reach_cw)
+        np.minimum(reach_ccw, offset, out=reach_ccw)
+
+        done = walking & ((reach_cw - reach_ccw) == span)
+        if done.any():
+            rows, cols = np.nonzero(done)
+            last[rows, index[cols]] = offset[rows, cols]
+            walking &= ~done
+            keep = walking.any(axis=0)
+            index = index[keep]
+            offset = offset[:, keep]
+            reach_cw = reach_cw[:, keep]
+            reach_ccw = reach_ccw[:, keep]
+            walking = walking[:, keep]
+    return last
+
+
+def _antithetic_sums(num_positions, clockwise_prob, n_pairs, rng):
+    """Sums of each pair's contribution and of its square, indexed by offset modulo N"""
+    n = num_positions
+    last = _antithetic_chunk(n, clockwise_prob, n_pairs, rng) % n
+    either = np.bincount(last[0], minlength=n) + np.bincount(last[1], minlength=n)
+    both = np.bincount(last[0][last[0] == last[1]], minlength=n)
+    # contribution (I1 + I2) / 2, its square (I1 + I2 + 2 I1 I2) / 4
+    return either / 2.0, (either + 2 * both) / 4.0
+
+
+def _conditional_sums(num_positions, clockwise_prob, n_walks, remaining, rng):
+    """
+    Run n_walks walks until `remaining` positions are left uncolored and add
+    the exact probability of each of them being last.
+
+    Returns:
+        Sums of each walk's contribution and of its square, indexed by
+        offset modulo N
+    """
+    n = num_positions
+    span = n - 1
+    dtype = np.int16 if n < 1 << 14 else np.int32
+    total = np.zeros(n)
+    squares = np.zeros(n)
+    if span == 0:
+        total[0] = squares[0] = n_walks
+        return total, squares
+    if span == 1:
+        # The only other position is last, after one step
+        total[1] = squares[1] = n_walks
+        return total, squares
+
+    # Gambler's-ruin exit probabilities by distance from the counterclockwise exit,
+    # across the N - 1 and N - 2 wide stretches used below
+    def table(exit_probability, interval_length):
+        return np.array([exit_probability(clockwise_prob, d, interval_length) for d in range(n + 1)])
+    wide = table(exit_cw_probability, span), table(exit_ccw_probability, span)
+    narrow = table(exit_cw_probability, span - 1), table(exit_ccw_probability, span - 1)
+    gap = np.arange(1, remaining + 1)
+
+    offset = np.zeros(n_walks, dtype=dtype)
+    reach_cw = np.zeros_like(offset)
+    reach_ccw = np.zeros_like(offset)
+    while offset.size:
+        done = (reach_cw - reach_ccw) == span - remaining
+        if done.any():
+            probs, positions = _gap_last_probs(
+                offset[done].astype(np.int64), reach_cw[done].astype(np.int64),
+                gap, n, wide, narrow
+            )
+            total += np.bincount(positions.ravel(), weights=probs.ravel(), minlength=n)
+            squares += np.bincount(positions.ravel(), weights=(probs ** 2).ravel(), minlength=n)
+            keep = ~done
+            offset = offset[keep]
+            reach_cw = reach_cw[keep]
+            reach_ccw = reach_ccw[keep]
+            if not offset.size:
+                break
+
+        offset += step_directions(rng, offset.size, clockwise_prob)
+        np.maximum(reach_cw, offset, out=reach_cw)
+        np.minimum(reach_ccw, offset, out=reach_ccw)
+    return total, squares
+
+
+def _gap_last_probs(offset, reach_cw, gap, num_positions, wide, narrow):
+    """
+    Exact P(last = reach_cw + j) for every uncolored position j = 1..g of
+    each walk.
+
+    Position c = reach_cw + j is last exactly when the walker reaches both of
+    its neighbours, u = c - 1 and l = c + 1 - N unrolled, before leaving
+    [l - 1, u + 1]. A neighbour already colored (j = 1 or j = g) needs no
+    visit, which leaves a single gambler's-ruin race.
+
+    wide and narrow are (clockwise, counterclockwise) exit-probability
+    tables, both sides computed directly so tiny probabilities survive.
+
+    Returns:
+        Tuple of ((walks, g) probabilities, (walks, g) offsets modulo N)
+    """
+    n = num_positions
+    g = len(gap)
+    x = offset[:, None]
+    dist = x - (reach_cw[:, None] + gap + 1 - n)  # walker's distance above l
+
+    wide_cw, wide_ccw = wide
+    narrow_cw, narrow_ccw = narrow
+
+    # Neither neighbour colored: reach u then l, or l then u
+    probs = narrow_cw[dist] * wide_ccw[n - 2] + narrow_ccw[dist] * wide_cw[1]
+    # u colored (j = 1): reach l before u + 1
+    probs[:, 0] = wide_ccw[dist[:, 0]]
+    # l colored (j = g): reach u before l - 1
+    probs[:, g - 1] = wide_cw[dist[:, g - 1] + 1]
+    if g == 1:
+        probs[:, 0] = 1.0
+    return probs, (reach_cw[:, None] + gap) % n
+
+
+def variance_reduced_last_position(num_positions=12, start_position=12, clockwise_prob=0.5,
+                                   n_simulations=10000, estimator="conditional", remaining=None,
+                                   rng=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Estimate P(last = k) with a variance-reduced estimator.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        n_simulations: Number of walks (rounded up to whole pairs for "antithetic")
+        estimator: "antithetic" or "conditional"
+        remaining: For "conditional", how many positions are left uncolored
+            when the exact answer takes over (1..N-1; N - 1 is exact_solver's
+            answer with no sampling at all). None uses default_remaining(N)
+        rng: numpy Generator, seed, or None for a fresh unseeded generator
+        chunk_size: Number of walks advanced together in one block
+        progress: Optional callback(walks_done, runs), called between blocks
+            at most progress.DEFAULT_MAX_RATE times a second
+
+    Returns:
+        Dictionary with
+            'estimator': the estimator used
+            'remaining': positions left to the exact answer ("conditional" only)
+            'runs': number of walks simulated
+            'probs': length N + 1 array of estimated P(last = k) (entry 0 unused)
+            'std_error': standard error of each estimate
+            'counts': probs * runs, comparable to plain last-position counts
+            'ess_gain': per-position gain over plain Monte Carlo with as many
+                walks (NaN where the probability is 0 or 1)
+            'overall_gain': gain summed over all positions
+            'ess': effective number of plain walks, runs * overall_gain
+    """
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator {estimator!r}, expected one of {ESTIMATORS}")
+    n = num_positions
+    if remaining is None:
+        remaining = default_remaining(n)
+    if estimator == "conditional" and n > 2 and not 1 <= remaining <= n - 1:
+        raise ValueError(f"remaining must be between 1 and {n - 1}")
+    rng = np.random.default_rng(rng)
+    progress = throttled(progress)
+
+    # Each unit (a pair or a single walk) contributes one vector to the average
+    walks_per_unit = 2 if estimator == "antithetic" else 1
+    units = -(-n_simulations // walks_per_unit)
+    units_per_chunk = max(1, chunk_size // walks_per_unit)
+    total = np.zeros(n)
+    squares = np.zeros(n)
+    units_left = units
+    while units_left > 0:
+        n_chunk = min(units_per_chunk, units_left)
+        if estimator == "antithetic":
+            chunk_total, chunk_squares = _antithetic_sums(n, clockwise_prob, n_chunk, rng)
+        else:
+            chunk_total, chunk_squares = _conditional_sums(n, clockwise_prob, n_chunk,
+                                                           remaining, rng)
+        total += chunk_total
+        squares += chunk_squares
+        units_left -= n_chunk
+        if progress is not None:
+            progress((units - units_left) * walks_per_unit, units * walks_per_unit)
+
+    runs = units * walks_per_unit
+    mean = total / units
+    unit_variance = squares / units - mean ** 2
+    # Where the estimate is exact, summing `units` contributions still leaves
+    # rounding of up to about units * eps of the second moment. Anything that
+    # small counts as exact (zero variance, infinite gain), so the per-position
+    # and overall gains agree; the threshold is relative, so the genuinely tiny
+    # variances of rare positions are kept
+    rounding = 16 * np.finfo(float).eps * units
+    unit_variance[unit_variance <= rounding * squares / units] = 0.0
+    estimate_variance = unit_variance / units
+    plain_variance = mean * (1.0 - mean) / runs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain = np.where(plain_variance > 0, plain_variance / estimate_variance, np.nan)
+        overall_gain = float(plain_variance.sum() / estimate_variance.sum())
+
+    # Offset m from the start is position start + m
+    def by_position(values):
+        result = np.zeros(n + 1)
+        result[1:] = np.roll(values, start_position - 1)
+        return result
+
+    probs = by_position(mean)
+    return {
+        'estimator': estimator,
+        'remaining': remaining if estimator == "conditional" else None,
+        'runs': runs,
+        'probs': probs,
+        'std_error': by_position(np.sqrt(estimate_variance)),
+        'counts': probs * runs,
+        'ess_gain': by_position(gain),
+        'overall_gain': overall_gain,
+        'ess': runs * overall_gain
+    }
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Export a simulated walk as an animated GIF or an MP4 video.
+
+Frames are produced one at a time by a generator (drawn with the blitted
+ClockAnimator) and written straight into the encoder, so only one frame is
+in memory at any moment:
+
+- GIF frames are quantized and appended to the output as they arrive, using
+  Pillow's frame-level GIF writer.
+- MP4 frames are piped as raw RGBA into an ffmpeg process.
+
+export_walk returns the finished file as bytes; it is self-contained, so it
+can be submitted to a background worker (the dashboard does this) and the
+result offered as a download.
+"""
+
+import io
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+from PIL import GifImagePlugin, Image
+
+from clock_renderer import ClockAnimator
+
+FORMATS = ("gif", "mp4")
+MIME_TYPES = {"gif": "image/gif", "mp4": "video/mp4"}
+
+
+def iter_walk_frames(record, dpi=50, hold_last=10):
+    """
+    Yield one RGBA frame per step of a walk.
+
+    Args:
+        record: CompactPath of the walk (decoded lazily as frames are drawn)
+        dpi: Resolution of the frames (the clock figure is 10x10 inches)
+        hold_last: Extra copies of the final frame, so the end stays on screen
+
+    Yields:
+        (height, width, 4) uint8 numpy arrays
+    """
+    animator = ClockAnimator(record.num_positions, record.start_position, dpi=dpi)
+    last_step = len(record) - 1
+    visited = set()
+    prev_pos = None
+
+    for step_num, current_pos in enumerate(record):
+        visited.add(current_pos)
+        if prev_pos is not None:
+            clockwise = record.directions(step_num - 1, step_num)[0] == 1
+            direction_label = "↻ CW" if clockwise else "↺ CCW"
+        else:
+            direction_label = ""
+        is_last = step_num == last_step
+        frame = animator.render(
+            visited, current_pos,
+            current_pos if is_last else None,
+            f"Step {step_num}: At Position {current_pos}",
+            prev_position=prev_pos, direction_label=direction_label
+        )
+        yield frame
+        if is_last:
+            for _ in range(hold_last):
+                yield frame
+        prev_pos = current_pos
+
+
+def write_gif(frames, fp, fps=8):
+    """
+    Stream frames into an animated GIF.
+
+    Args:
+        frames: Iterable of RGBA frames (all the same size)
+        fp: Binary file object to write to
+        fps: Frames per second
+    """
+    duration = int(round(1000 / fps))
+    wrote_header = False
+    for frame in frames:
+        # Each frame gets its own 256-color palette, stored as a local color table
+        image = Image.fromarray(frame[:, :, :3]).quantize(colors=256)
+        if not wrote_header:
+            header, _ = GifImagePlugin.getheader(image, info={"loop": 0})
+            for chunk in header:
+                fp.write(chunk)
+            wrote_header = True
+        for chunk in GifImagePlugin.getdata(image, duration=duration, include_color_table=True):
+            fp.write(chunk)
+    if wrote_header:
+        fp.write(b";")  # GIF trailer
+
+
+def ffmpeg_path():
+    """Location of the ffmpeg executable (as configured for matplotlib), or None"""
+    return shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+
+
+def write_mp4(frames, fp, fps=8):
+    """
+    Stream frames through ffmpeg into an H.264 MP4.
+
+    Args:
+        frames: Iterable of RGBA frames (all the same size, even dimensions)
+        fp: Binary file object to write to
+        fps: Frames per second
+    """
+    ffmpeg = ffmpeg_path()
+    if ffmpeg is None:
+        raise RuntimeError("MP4 export needs ffmpeg on the PATH (or matplotlib's animation.ffmpeg_path)")
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return
+    height, width = first.shape[:2]
+
+    command = [
+        ffmpeg, "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-vcodec", "libx264", "-pix_fmt", "yuv420p",
+        # Fragmented MP4 can be written to a pipe (no seeking back to the header)
+        "-movflags", "frag_keyframe+empty_moov", "-f", "mp4", "-"
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+
+    # Read the encoded output on a helper thread so neither pipe can fill up and block
+    reader = ThreadPoolExecutor(max_workers=1)
+    output = reader.submit(lambda: shutil.copyfileobj(process.stdout, fp))
+    try:
+        process.stdin.write(first.tobytes())
+        for frame in frames:
+            process.stdin.write(frame.tobytes())
+    finally:
+        process.stdin.close()
+        output.result()
+        reader.shutdown()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {process.stderr.read().decode(errors='replace')}")
+
+
+def export_walk(record, fmt="gif", fps=8, dpi=50):
+    """
+    Encode a walk as GIF or MP4.
+
+    Args:
+        record: CompactPath of the walk
+        fmt: "gif" or "mp4"
+        fps: Frames per second
+        dpi: Resolution of the frames
+
+    Returns:
+        Encoded file contents as bytes
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {FORMATS}")
+
+    buffer = io.BytesIO()
+    frames = iter_walk_frames(record, dpi=dpi)
+    if fmt == "gif":
+        write_gif(frames, buffer, fps)
+    else:
+        write_mp4(frames, buffer, fps)
+    return buffer.getvalue()
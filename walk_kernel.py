@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+Shared single-walk kernel for the Ladybug Clock Problem.
+
+A walk on a cycle always covers one contiguous arc around its start, so the
+whole state of a walk is three integers: its current offset from the start,
+the furthest offset it has reached clockwise (>= 0) and the furthest offset it
+has reached counterclockwise (<= 0). The hot loop does no hashing and grows no
+containers, and memory per walk does not depend on num_positions.
+"""
+
+import math
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+
+def offset_to_position(num_positions, start_position, offset):
+    """Convert an offset from the start (clockwise positive) into a clock position"""
+    return ((start_position - 1 + offset) % num_positions) + 1
+
+
+def arc_positions(num_positions, start_position, reach_cw, reach_ccw):
+    """
+    List the positions covered by an arc, from its counterclockwise end round
+    to its clockwise end.
+    """
+    return [offset_to_position(num_positions, start_position, k)
+            for k in range(reach_ccw, reach_cw + 1)]
+
+
+def walk_arc(num_positions=12, start_position=12, clockwise_prob=0.5,
+             end_position=None, steps_limit=None, directions=None, rng=random):
+    """
+    Run one walk until every position is colored (or it stops early).
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        end_position: Stop as soon as this position is reached (optional)
+        steps_limit: Stop after this many steps (optional)
+        directions: If a list is given, every step's direction (+1 / -1) is
+            appended to it so the caller can rebuild the path
+        rng: Object with a random() method (the random module by default)
+
+    Returns:
+        Dictionary with the last position, step count, reached arc and
+        whether end_position was reached
+    """
+    rand = rng.random
+    span = num_positions - 1
+    offset = 0
+    reach_cw = 0
+    reach_ccw = 0
+    steps = 0
+
+    if end_position is None and steps_limit is None and directions is None:
+        # Fast path: plain cover walk
+        while reach_cw - reach_ccw < span:
+            if rand() < clockwise_prob:
+                offset += 1
+                if offset > reach_cw:
+                    reach_cw = offset
+            else:
+                offset -= 1
+                if offset < reach_ccw:
+                    reach_ccw = offset
+            steps += 1
+
+        return {
+            'last_position': offset_to_position(num_positions, start_position, offset),
+            'steps': steps,
+            'reach_cw': reach_cw,
+            'reach_ccw': reach_ccw,
+            'reached_end': False
+        }
+
+    # Offsets at which the walk stands on end_position. An offset can never
+    # reach +/-num_positions before the cover completes, so that is a safe
+    # "never" value.
+    if end_position is None:
+        end_cw = end_ccw = num_positions
+    else:
+        end_cw = (end_position - start_position) % num_positions
+        end_ccw = end_cw - num_positions
+    record = directions.append if directions is not None else None
+    reached_end = False
+
+    while reach_cw - reach_ccw < span:
+        if rand() < clockwise_prob:
+            offset += 1
+            if offset > reach_cw:
+                reach_cw = offset
+            direction = 1
+        else:
+            offset -= 1
+            if offset < reach_ccw:
+                reach_ccw = offset
+            direction = -1
+        steps += 1
+
+        if record is not None:
+            record(direction)
+
+        if offset == end_cw or offset == end_ccw:
+            reached_end = True
+            break
+
+        if steps_limit and steps >= steps_limit:
+            break
+
+    return {
+        'last_position': offset_to_position(num_positions, start_position, offset),
+        'steps': steps,
+        'reach_cw': reach_cw,
+        'reach_ccw': reach_ccw,
+        'reached_end': reached_end
+    }
+
+
+def path_from_directions(num_positions, start_position, directions):
+    """Rebuild the list of visited positions (including the start) from step directions"""
+    path = [start_position]
+    current_pos = start_position
+    for direction in directions:
+        current_pos = ((current_pos - 1 + direction) % num_positions) + 1
+        path.append(current_pos)
+    return path
+
+
+# One event of a streamed walk; direction is 0 for the starting event
+WalkStep = namedtuple('WalkStep', ['step', 'position', 'direction', 'is_new', 'covered_count'])
+
+
+def iter_walk(num_positions=12, start_position=12, clockwise_prob=0.5,
+              end_position=None, steps_limit=None, rng=random):
+    """
+    Stream a walk one step at a time.
+
+    The walk is the same as walk_arc's for the same random numbers, but
+    nothing is stored: each step is yielded as soon as it is taken, so a
+    consumer can animate, log or analyse it as it goes and stop early simply
+    by no longer iterating.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        end_position: Stop as soon as this position is reached (optional)
+        steps_limit: Stop after this many steps (optional)
+        rng: Object with a random() method (the random module by default)
+
+    Yields:
+        WalkStep(step, position, direction, is_new, covered_count) tuples,
+        starting with step 0 at the start position
+    """
+    rand = rng.random
+    span = num_positions - 1
+    offset = 0
+    reach_cw = 0
+    reach_ccw = 0
+    steps = 0
+
+    yield WalkStep(0, start_position, 0, True, 1)
+
+    while reach_cw - reach_ccw < span:
+        is_new = False
+        if rand() < clockwise_prob:
+            offset += 1
+            if offset > reach_cw:
+                reach_cw = offset
+                is_new = True
+            direction = 1
+        else:
+            offset -= 1
+            if offset < reach_ccw:
+                reach_ccw = offset
+                is_new = True
+            direction = -1
+        steps += 1
+
+        position = offset_to_position(num_positions, start_position, offset)
+        yield WalkStep(steps, position, direction, is_new, reach_cw - reach_ccw + 1)
+
+        if position == end_position:
+            break
+        if steps_limit and steps >= steps_limit:
+            break
+
+
+def exit_cw_probability(clockwise_prob, distance_ccw, interval_length):
+    """
+    Gambler's-ruin probability of leaving an interval through its clockwise end.
+
+    The walker stands distance_ccw steps from the counterclockwise exit and
+    interval_length - distance_ccw steps from the clockwise exit.
+
+    Args:
+        clockwise_prob: Probability of moving clockwise on each step
+        distance_ccw: Distance from the walker to the counterclockwise exit
+        interval_length: Distance between the two exits
+
+    Returns:
+        Probability that the clockwise exit is reached first
+    """
+    i = distance_ccw
+    a = interval_length
+    if i <= 0:
+        return 0.0
+    if i >= a:
+        return 1.0
+    if clockwise_prob == 0.5:
+        return i / a
+    if clockwise_prob >= 1.0:
+        return 1.0
+    if clockwise_prob <= 0.0:
+        return 0.0
+    # (1 - r^i) / (1 - r^a) with r = q/p, written with expm1 so that answers
+    # near 0 keep their relative accuracy instead of cancelling to 0
+    log_ratio = math.log1p(-clockwise_prob) - math.log(clockwise_prob)
+    if log_ratio < 0:
+        return math.expm1(i * log_ratio) / math.expm1(a * log_ratio)
+    # Same formula in powers of p/q, so large intervals can't overflow
+    return math.exp(-(a - i) * log_ratio) * math.expm1(-i * log_ratio) / math.expm1(-a * log_ratio)
+
+
+def exit_ccw_probability(clockwise_prob, distance_ccw, interval_length):
+    """
+    Gambler's-ruin probability of leaving an interval through its
+    counterclockwise end.
+
+    Computed as the mirrored clockwise exit rather than as
+    1 - exit_cw_probability(...), which would round anything below about
+    1e-16 to 0.
+
+    Args:
+        clockwise_prob: Probability of moving clockwise on each step
+        distance_ccw: Distance from the walker to the counterclockwise exit
+        interval_length: Distance between the two exits
+
+    Returns:
+        Probability that the counterclockwise exit is reached first
+    """
+    return exit_cw_probability(1.0 - clockwise_prob, interval_length - distance_ccw,
+                               interval_length)
+
+
+def _geometric_failures(rand, one_minus_rho):
+    """Number of failures before the first success, success probability one_minus_rho"""
+    if one_minus_rho >= 1.0:
+        return 0
+    return int(math.log(1.0 - rand()) / math.log1p(-one_minus_rho))
+
+
+def _exit_gap(clockwise_prob, interval_length, v):
+    """
+    1 - rho_v for the eigenvalue rho_v = 4pq*cos^2(pi*v/a) of the walk killed
+    at both ends of an interval, written so it stays accurate when it is tiny.
+
+    Returns:
+        Tuple of (sin^2(pi*v/a), 1 - rho_v)
+    """
+    p = clockwise_prob
+    sin_sq = math.sin(math.pi * v / interval_length) ** 2
+    return sin_sq, (p - (1 - p)) ** 2 + 4 * p * (1 - p) * sin_sq
+
+
+@lru_cache(maxsize=64)
+def _far_exit_gaps(clockwise_prob, interval_length):
+    """1 - rho_v for v = 1..(a-1)//2, the rates of the geometrics in a far-exit time"""
+    p = clockwise_prob
+    v = np.arange(1, (interval_length - 1) // 2 + 1)
+    sin_sq = np.sin(np.pi * v / interval_length) ** 2
+    return (p - (1 - p)) ** 2 + 4 * p * (1 - p) * sin_sq
+
+
+@lru_cache(maxsize=64)
+def _far_exit_log_rhos(clockwise_prob, interval_length):
+    """log(rho_v) for the far-exit geometrics, as a tuple for a plain-Python loop"""
+    gaps = _far_exit_gaps(clockwise_prob, interval_length)
+    return tuple(-math.inf if gap >= 1.0 else math.log1p(-gap) for gap in gaps.tolist())
+
+
+def sample_exit_steps(clockwise_prob, interval_length, near_exit, rng=random):
+    """
+    Sample how many steps a walker next to one end of an interval needs to
+    leave it, given which end it leaves by.
+
+    Uses the eigenvalues rho_v = 4pq*cos^2(pi*v/a) of the walk killed at both ends:
+    - Leaving by the near end takes 2k+1 steps, where k is geometric with
+      rate 1 - rho_v and v is drawn with weight sin^2(theta_v) / (1 - rho_v).
+      That weight never exceeds 1, so v is drawn by rejection from a uniform
+      pick in O(1) expected draws (at least half are accepted).
+    - Crossing to the far end takes (a mod 2) + 2 * sum of independent
+      geometrics with rates 1 - rho_v, one for each v < a/2, drawn as one
+      NumPy vector from a Generator or by inversion from any other rng.
+
+    Args:
+        clockwise_prob: Probability of moving clockwise on each step
+        interval_length: Distance between the two exits
+        near_exit: True if the walker leaves by the end it stands next to
+        rng: Object with a random() method, or a numpy Generator
+
+    Returns:
+        Number of steps taken until the exit
+    """
+    rand = rng.random
+    a = interval_length
+
+    if near_exit:
+        while True:
+            v = 1 + int(rand() * (a - 1))
+            sin_sq, gap = _exit_gap(clockwise_prob, a, v)
+            if rand() * gap < sin_sq:
+                return 2 * _geometric_failures(rand, gap) + 1
+
+    if a < 3:
+        return (a - 1) % 2
+    if isinstance(rng, np.random.Generator):
+        return (a - 1) % 2 + 2 * int(rng.geometric(_far_exit_gaps(clockwise_prob, a)).sum())
+    # Each geometric counts its successful trial too, hence len(log_rhos)
+    log_rhos = _far_exit_log_rhos(clockwise_prob, a)
+    failures = sum(int(math.log(1.0 - rand()) / log_rho) for log_rho in log_rhos)
+    return (a - 1) % 2 + 2 * (len(log_rhos) + failures)
+
+
+def walk_events(num_positions=12, start_position=12, clockwise_prob=0.5,
+                end_position=None, count_steps=False, rng=random):
+    """
+    Run one walk as a sequence of "arc exit" events instead of single steps.
+
+    From inside the colored arc the walk jumps straight to the end it leaves
+    by, drawn from the gambler's-ruin exit probabilities, so one run costs
+    O(num_positions) events instead of O(num_positions^2) steps.
+
+    Args:
+        num_positions: Number of positions on the clock
+        start_position: Starting position (1..num_positions)
+        clockwise_prob: Probability of moving clockwise on each step
+        end_position: Stop as soon as this position is colored (optional,
+            must differ from start_position)
+        count_steps: If True, also sample the number of steps each exit took
+        rng: Object with a random() method (the random module by default)
+
+    Returns:
+        Dictionary shaped like walk_arc's result; 'steps' is None unless
+        count_steps is True
+    """
+    if end_position is not None and end_position == start_position:
+        raise ValueError("Event-driven walks can't stop on a return to the start position")
+
+    rand = rng.random
+    span = num_positions - 1
+    if end_position is None:
+        end_cw = end_ccw = num_positions
+    else:
+        end_cw = (end_position - start_position) % num_positions
+        end_ccw = end_cw - num_positions
+    offset = 0
+    reach_cw = 0
+    reach_ccw = 0
+    steps = 0 if count_steps else None
+    reached_end = False
+
+    while reach_cw - reach_ccw < span:
+        # Exits sit one step beyond each end of the colored arc
+        interval_length = reach_cw - reach_ccw + 2
+        distance_ccw = offset - reach_ccw + 1
+        leave_cw = rand() < exit_cw_probability(clockwise_prob, distance_ccw, interval_length)
+
+        if count_steps:
+            near_exit = (distance_ccw == 1) != leave_cw or interval_length == 2
+            steps += sample_exit_steps(clockwise_prob, interval_length, near_exit, rng)
+
+        if leave_cw:
+            reach_cw += 1
+            offset = reach_cw
+        else:
+            reach_ccw -= 1
+            offset = reach_ccw
+
+        if offset == end_cw or offset == end_ccw:
+            reached_end = True
+            break
+
+    return {
+        'last_position': offset_to_position(num_positions, start_position, offset),
+        'steps': steps,
+        'reach_cw': reach_cw,
+        'reach_ccw': reach_ccw,
+        'reached_end': reached_end
+    }